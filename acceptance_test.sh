@@ -24,4 +24,4 @@ export TRIGGER_SETTINGS=${TRIGGER_TEST_DIR}/data/settings.py
 export NETDEVICES_SOURCE=${TRIGGER_TEST_DIR}/data/netdevices.xml
 export BOUNCE_FILE=${TRIGGER_TEST_DIR}/data/bounce.py
 
-python2.7 -W ignore::RuntimeWarning ${BASEDIR}/tests/acceptance/trigger_acceptance_tests.py
+python2.7 -W ignore::RuntimeWarning -m pytest ${BASEDIR}/tests/acceptance/trigger_acceptance_tests.py
@@ -49,15 +49,17 @@ class TestCommand(Command):
         if project_root:
             os.chdir(project_root)
 
-        # Set up environment to point to mockup files.
-        test_path = os.path.join(os.getcwd(), 'tests', 'data')
-        os.environ['TRIGGER_SETTINGS'] = os.path.join(test_path, 'settings.py')
-        os.environ['NETDEVICES_SOURCE'] = \
-            os.path.join(test_path, 'netdevices.xml')
-        os.environ['AUTOACL_FILE'] = os.path.join(test_path, 'autoacl.py')
-        os.environ['BOUNCE_FILE'] = os.path.join(test_path, 'bounce.py')
-        os.environ['TACACSRC'] = os.path.join(test_path, 'tacacsrc')
-        os.environ['TACACSRC_KEYFILE'] = os.path.join(test_path, 'tackf')
+        # Set up environment to point to mockup files. The data directory
+        # prefix is computed once and the file names are appended to it.
+        test_path = os.path.join(os.getcwd(), 'tests', 'data') + os.sep
+        os.environ.update({
+            'TRIGGER_SETTINGS': test_path + 'settings.py',
+            'NETDEVICES_SOURCE': test_path + 'netdevices.xml',
+            'AUTOACL_FILE': test_path + 'autoacl.py',
+            'BOUNCE_FILE': test_path + 'bounce.py',
+            'TACACSRC': test_path + 'tacacsrc',
+            'TACACSRC_KEYFILE': test_path + 'tackf',
+        })
 
         # Run each .py file found under tests.
         args = [unittest.__file__]
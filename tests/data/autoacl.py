@@ -4,18 +4,22 @@ from twisted.python import log
 
 DC_ONCALL_ID = '17'
 
+# The possible results are identical across devices, so share them instead of
+# building a new set for every device.
+_EMPTY = frozenset()
+_JUN_CORE = frozenset(['115j', 'router-protect.core'])
+_JUN = frozenset(['115j', 'router-protect'])
+
 def autoacl(dev, explicit_acls=None):
     """A simple test case. NYI"""
-    acls = set()
     log.msg('[%s]: Adding auto ACLs' % dev)
     if dev.vendor == 'juniper':
         log.msg('[%s]: Adding 115j' % dev)
-        acls.add('115j')
         if dev.onCallID == DC_ONCALL_ID:
-            acls.add('router-protect.core')
             log.msg('[%s]: Adding router-protect.core' % dev)
+            return _JUN_CORE
         else:
-            acls.add('router-protect')
             log.msg('[%s]: Adding router-protect' % dev)
+            return _JUN
 
-    return acls
+    return _EMPTY
@@ -1,5 +1,7 @@
 import os
 
+from trigger.conf import global_settings
+
 # Owners to use in testing...
 VALID_OWNERS = ('Data Center',)
 
@@ -25,6 +27,14 @@ WITH_ACLS = True
 # Configs
 NETDEVICES_SOURCE = os.environ.get('NETDEVICES_SOURCE',
                                    os.path.join(PREFIX, 'netdevices.xml'))
+
+# Keep the parsed netdevices.xml between the NetDevices reloads in the tests
+_XML_LOADER = 'trigger.netdevices.loaders.filesystem.XMLLoader'
+NETDEVICES_LOADERS = tuple(
+    (_XML_LOADER, True) if loader == _XML_LOADER else loader
+    for loader in global_settings.NETDEVICES_LOADERS
+)
+
 AUTOACL_FILE = os.environ.get('AUTOACL_FILE',
                               os.path.join(PREFIX, 'autoacl.py'))
 BOUNCE_FILE = os.environ.get('BOUNCE_FILE', os.path.join(PREFIX, 'bounce.py'))
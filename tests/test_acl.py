@@ -6,11 +6,21 @@ __maintainer__ = 'Jathan McCollum'
 __copyright__ = 'Copyright 2005-2011 AOL Inc.; 2013 Salesforce.com'
 __version__ = '2.0'
 
-from StringIO import StringIO
+from cStringIO import StringIO
+import IPy
 import unittest
 from trigger import acl, exceptions
+from trigger.acl import parser
 
 EXAMPLES_FILE = 'tests/data/junos-examples.txt'
+_examples = None
+
+def _load_examples():
+    """Read and split EXAMPLES_FILE, once per test run."""
+    global _examples
+    if _examples is None:
+        _examples = file(EXAMPLES_FILE).read().expandtabs().split('\n\n')
+    return _examples
 
 # Some representative match clauses:
 ios_matches = ('tcp 192.0.2.0 0.0.0.255 any gt 65530',                # 1
@@ -23,6 +33,11 @@ ios_matches = ('tcp 192.0.2.0 0.0.0.255 any gt 65530',                # 1
                'tcp 192.0.2.96 0.0.0.31 any eq 80',                # 8
                'ip any any')
 
+# The same match clauses as numbered and named IOS ACL text.
+IOS_ACL_TEXT = '\n'.join('access-list 100 permit ' + m for m in ios_matches)
+IOS_NAMED_ACL_TEXT = ('ip access-list extended foo\n' +
+                      '\n'.join(' permit ' + m for m in ios_matches))
+
 
 class CheckRangeList(unittest.TestCase):
     """Test functionality of RangeList object"""
@@ -58,6 +73,12 @@ class CheckRangeList(unittest.TestCase):
         r = acl.RangeList([5, 5, 5, 8, 9, 10])
         self.assertEqual(r, [5, (8, 10)])
 
+    def testManyDiscreteValues(self):
+        """Make sure long lists don't exhaust the recursion limit."""
+        r = acl.RangeList(range(0, 10000, 2) + [(20000, 30000)])
+        self.assertEqual(len(r), 5001)
+        self.assertEqual(r[-1], (20000, 30000))
+
     def testNonIncrementable(self):
         """Make sure non-incrementable values can be stored."""
         r = acl.RangeList(['y', 'x'])
@@ -73,6 +94,18 @@ class CheckRangeList(unittest.TestCase):
         self.assertTrue(acl.TIP('10.1.1.1') in r)
         self.assertTrue(acl.TIP('192.168.1.1') not in r)
 
+    def testRangeListContainsIndexed(self):
+        """Check IP block containment against many blocks."""
+        r = acl.RangeList([acl.TIP('10.%d.0.0/16' % i) for i in range(256)])
+        r.append(acl.TIP('192.0.2.0/24'))
+        self.assertTrue(acl.TIP('10.200.1.1') in r)
+        self.assertTrue(acl.TIP('10.200.0.0/20') in r)
+        self.assertTrue(acl.TIP('10.0.0.0/8') not in r)
+        self.assertTrue(acl.TIP('192.0.2.128/25') in r)
+        self.assertTrue(acl.TIP('192.0.3.1') not in r)
+        # Negated blocks fall back to TIP's own containment rules.
+        self.assertTrue(acl.TIP('10.1.1.1/32 except') not in r)
+
 class CheckACLNames(unittest.TestCase):
     """Test ACL naming validation"""
     def testOkNames(self):
@@ -260,22 +293,28 @@ class CheckProtocolClass(unittest.TestCase):
         self.assertEqual(p, 99)
 
 
+def _build_acl():
+    """Return the baseline ACL used by the output tests."""
+    a = acl.ACL()
+    t1 = acl.Term(name='p99')
+    t1.match['protocol'] = [99]
+    t1.action = 'accept'
+    a.terms.append(t1)
+    t2 = acl.Term(name='windows')
+    t2.match['protocol'] = ['tcp']
+    t2.match['source-address'] = ['192.0.2.0/24']
+    t2.match['destination-port'] = range(135, 139) + [445]
+    t2.action = 'reject'
+    t2.modifiers['syslog'] = True
+    a.terms.append(t2)
+    return a
+
 class CheckOutput(unittest.TestCase):
     """Test .output() methods for various ACL vendors"""
     def setUp(self):
         super(CheckOutput, self).setUp()
-        self.a = acl.ACL()
-        self.t1 = acl.Term(name='p99')
-        self.t1.match['protocol'] = [99]
-        self.t1.action = 'accept'
-        self.a.terms.append(self.t1)
-        self.t2 = acl.Term(name='windows')
-        self.t2.match['protocol'] = ['tcp']
-        self.t2.match['source-address'] = ['192.0.2.0/24']
-        self.t2.match['destination-port'] = range(135, 139) + [445]
-        self.t2.action = 'reject'
-        self.t2.modifiers['syslog'] = True
-        self.a.terms.append(self.t2)
+        self.a = _build_acl()
+        self.t1, self.t2 = self.a.terms
 
     def testJunOS(self):
         """Test conversion of ACLs and terms to JunOS format"""
@@ -369,7 +408,7 @@ class CheckIOSParseAndOutput(unittest.TestCase):
     """Test parsing of IOS ACLs"""
     def testIOSACL(self):
         """Test parsing of IOS numbered ACLs."""
-        text = '\n'.join(['access-list 100 permit ' + x for x in ios_matches])
+        text = IOS_ACL_TEXT
         self.assertEqual('\n'.join(acl.parse(text).output_ios()), text)
         # Non-canonical forms:
         x = 'access-list 100 permit icmp any any log echo'
@@ -380,8 +419,7 @@ class CheckIOSParseAndOutput(unittest.TestCase):
 
     def testIOSNamedACL(self):
         """Test parsing of IOS named ACLs."""
-        x = 'ip access-list extended foo\n'
-        x += '\n'.join([' permit ' + x for x in ios_matches])
+        x = IOS_NAMED_ACL_TEXT
         a = acl.parse(x)
         self.assertEqual(a.output_ios_named(), x.split('\n'))
         self.assertEqual(a.format, 'ios_named')
@@ -429,11 +467,27 @@ ip access-list extended foo
         # maximum recursion depth.
         acl.parse('!'*200 + '\naccess-list 100 deny ip any any')
 
+    def testIOSReparse(self):
+        """Test that re-parsing the same text returns an independent ACL."""
+        x = 'access-list 100 permit tcp any host 192.0.2.99 eq 80'
+        a = acl.parse(x)
+        a.terms[0].match['destination-port'] = [443]
+        b = acl.parse(x)
+        self.assertFalse(a is b)
+        self.assertEqual(b.output_ios(), [x])
+
+    def testParserCompiledOnce(self):
+        """Test that the grammar is compiled once and shared by all parses."""
+        acl.parse('access-list 100 deny ip any any')
+        compiled = parser._get_parser()
+        acl.parse('access-list 101 deny ip any any')
+        self.assertTrue(parser._get_parser() is compiled)
+
 class CheckJunOSExamples(unittest.TestCase):
     """Test parsing of Junos ACLs"""
     def testJunOSExamples(self):
         """Test examples from JunOS documentation."""
-        examples = file(EXAMPLES_FILE).read().expandtabs().split('\n\n')
+        examples = _load_examples()
         # Skip the last two because they use the unimplemented "except"
         # feature in address matches.
         for i in range(0, 14, 2):
@@ -711,5 +765,16 @@ class CheckTriggerIP(unittest.TestCase):
         # Inactive and negated is always negated
         self.assertFalse(obj in self.test_net)
 
+    def testMatchesIPy(self):
+        """Test that TIP parses IPv4 strings the same way IPy does"""
+        for test in ('10/8', '1.2.3', '0.0.0.0/0', '1.2.3.4/32', '010.0.0.0',
+                     '1.2.3.0/255.255.255.0'):
+            obj, ref = acl.TIP(test), IPy.IP(test)
+            self.assertEqual((obj.int(), obj.prefixlen(), obj.version()),
+                             (ref.int(), ref.prefixlen(), ref.version()))
+            self.assertEqual(str(obj), str(ref))
+        for test in ('10.0.0.1/8', '256.0.0.0', '1.2.3.4/33'):
+            self.assertRaises(ValueError, acl.TIP, test)
+
 if __name__ == "__main__":
     unittest.main()
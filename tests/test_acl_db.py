@@ -11,20 +11,20 @@ mock_redis.install()
 
 # And now we can load the Trigger libs that call Redis
 from trigger.netdevices import NetDevices
-from trigger.acl.db import AclsDB
+from trigger.acl.db import AclsDB, get_matching_acls
 from trigger import exceptions
 import unittest
 
 # Globals
 adb = AclsDB()
+nd = NetDevices()
 DEVICE_NAME = 'test1-abc.net.aol.com'
 ACL_NAME = 'foo'
 
 class TestAclsDB(unittest.TestCase):
     def setUp(self):
-        self.nd = NetDevices()
         self.acl = ACL_NAME
-        self.device = self.nd.find(DEVICE_NAME)
+        self.device = nd.find(DEVICE_NAME)
         self.implicit_acls = set(['115j', 'router-protect.core'])
 
     def test_01_add_acl_success(self):
@@ -64,8 +64,59 @@ class TestAclsDB(unittest.TestCase):
         acl_set = 'bogus'
         self.assertRaises(exp, adb.get_acl_set, self.device, acl_set)
 
-    def tearDown(self):
-        NetDevices._Singleton = None
+    def test_08_get_acl_dict_after_change(self):
+        """Test associations are refreshed after add and remove"""
+        adb.get_acl_dict(self.device)
+        adb.add_acl(self.device, self.acl)
+        self.assertEqual(set([self.acl]),
+                         adb.get_acl_set(self.device, 'explicit'))
+        adb.remove_acl(self.device, self.acl)
+        self.assertEqual(set(), adb.get_acl_set(self.device, 'explicit'))
+
+    def test_09_prefetch_acls(self):
+        """Test prefetched associations match per-device lookups"""
+        adb.add_acl(self.device, self.acl)
+        prefetch_db = AclsDB()
+        prefetch_db.prefetch_acls(nd.values())
+        try:
+            for dev in nd.itervalues():
+                self.assertTrue(dev.nodeName in prefetch_db._acl_dict_cache)
+                self.assertEqual(adb.get_acl_dict(dev),
+                                 prefetch_db.get_acl_dict(dev))
+        finally:
+            adb.remove_acl(self.device, self.acl)
+
+    def test_10_get_matching_acls_prefix(self):
+        """Test matching ACLs and devices by name prefix"""
+        acls = sorted(self.implicit_acls)
+        found = get_matching_acls(['router-', '11'], exact=False, nd=nd)
+        self.assertTrue((DEVICE_NAME, acls) in found)
+        found = get_matching_acls(['test1-'], exact=False, match_acl=False,
+                                  match_device=True, nd=nd)
+        self.assertEqual([(DEVICE_NAME, acls)], found)
+        self.assertEqual([], get_matching_acls(['router-'], nd=nd))
+
+    def test_11_get_explicit_acl_set(self):
+        """Test explicit associations always come from Redis"""
+        explicit_db = AclsDB()
+        self.assertEqual(set(), explicit_db.get_acl_set(self.device, 'explicit'))
+        self.assertFalse(self.device.nodeName in explicit_db._acl_dict_cache)
+
+        # The same answer once the device is cached
+        explicit_db.get_acl_dict(self.device)
+        adb.add_acl(self.device, self.acl)
+        self.assertEqual(set([self.acl]),
+                         explicit_db.get_acl_set(self.device, 'explicit'))
+        adb.remove_acl(self.device, self.acl)
+        self.assertEqual(set(), explicit_db.get_acl_set(self.device, 'explicit'))
+
+    def test_12_acl_sets_are_mutable_copies(self):
+        """Test callers can't change the cached associations"""
+        acls = adb.get_acl_set(self.device)
+        acls.add('bogus')
+        adb.get_acl_dict(self.device)['explicit'].add('bogus')
+        self.assertEqual(self.implicit_acls, adb.get_acl_set(self.device))
+        self.assertEqual(set(), adb.get_acl_set(self.device, 'explicit'))
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,13 +8,11 @@ Only tests SQLite for now.
 """
 
 import datetime
-import os
-import tempfile
 from trigger.conf import settings
 
-# Override the DB file we're going to use.
-_, db_file = tempfile.mkstemp('.db')
-settings.DATABASE_NAME = db_file
+# Keep the test database in memory. This relies on the queue reusing the
+# connection opened by create_tables() below.
+settings.DATABASE_NAME = ':memory:'
 
 # Make sure we load the mock redis library
 from utils import mock_redis
@@ -22,7 +20,7 @@ mock_redis.install()
 
 # Now we can import from Trigger
 from trigger.acl import queue
-from trigger.acl.models import create_tables
+from trigger.acl.models import create_tables, database
 from trigger.acl.db import AclsDB
 from trigger.netdevices import NetDevices
 from trigger.utils import get_user
@@ -37,26 +35,35 @@ USERNAME = get_user()
 # Setup
 create_tables()
 adb = AclsDB()
-nd = NetDevices()
-# These must happen after we populate the dummy AclsDB
 
 def _setup_aclsdb(nd, device_name=DEVICE_NAME, acl=ACL_NAME):
-    """Add an explicit ACL to the dummy AclsDB"""
+    """
+    Add an explicit ACL to the dummy AclsDB, and return NetDevices reloaded
+    to pick it up if that was needed.
+    """
     #print 'Setting up ACLsdb: %s => %s' % (acl, device_name)
     dev = nd.find(device_name)
-    if acl not in dev.acls:
-        adb.add_acl(dev, acl)
+    if acl in dev.acls:
+        return nd
+    adb.add_acl(dev, acl)
     NetDevices._Singleton = None
-    nd = NetDevices()
+    return NetDevices()
 
 class TestAclQueue(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The association only has to be made (and NetDevices reloaded) once.
+        # This can't happen at import time: test_acl_db expects to add and
+        # remove the same association itself.
+        cls._nd = _setup_aclsdb(NetDevices())
+        cls._device = cls._nd.find(DEVICE_NAME)
+
     def setUp(self):
-        self.nd = NetDevices()
-        _setup_aclsdb(self.nd)
+        self.nd = self._nd
         self.q = queue.Queue(verbose=False)
         self.acl = ACL_NAME
         self.acl_list = [self.acl]
-        self.device = self.nd.find(DEVICE_NAME)
+        self.device = self._device
         self.device_name = DEVICE_NAME
         self.device_list = [self.device_name]
         self.user = USERNAME
@@ -80,32 +87,38 @@ class TestAclQueue(unittest.TestCase):
 
     def test_04_list_integrated_success(self):
         """Test listing integrated queue"""
-        self.q.insert(self.acl, self.device_list)
-        expected = [(u'test1-abc.net.aol.com', u'foo')]
-        self.assertEqual(sorted(expected), sorted(self.q.list()))
+        # Multi-statement tests commit once, or roll back if they fail.
+        with database.transaction():
+            self.q.insert(self.acl, self.device_list)
+            expected = [(u'test1-abc.net.aol.com', u'foo')]
+            self.assertEqual(expected, self.q.list())
 
     def test_05_complete_integrated(self):
         """Test mark task complete"""
-        self.q.complete(self.device_name, self.acl_list)
-        expected = []
-        self.assertEqual(sorted(expected), sorted(self.q.list()))
+        with database.transaction():
+            self.q.complete(self.device_name, self.acl_list)
+            expected = []
+            self.assertEqual(expected, self.q.list())
 
     def test_06_delete_integrated_with_devices(self):
         """Test delete ACL from queue providing devices"""
-        self.q.insert(self.acl, self.device_list)
-        self.assertTrue(self.q.delete(self.acl, self.device_list))
+        with database.transaction():
+            self.q.insert(self.acl, self.device_list)
+            self.assertTrue(self.q.delete(self.acl, self.device_list))
 
     def test_07_delete_integrated_no_devices(self):
         """Test delete ACL from queue without providing devices"""
-        self.q.insert(self.acl, self.device_list)
-        self.assertTrue(self.q.delete(self.acl))
+        with database.transaction():
+            self.q.insert(self.acl, self.device_list)
+            self.assertTrue(self.q.delete(self.acl))
 
     def test_08_remove_integrated_success(self):
         """Test remove (set as loaded) ACL from integrated queue"""
-        self.q.insert(self.acl, self.device_list)
-        self.q.remove(self.acl, self.device_list)
-        expected = []
-        self.assertEqual(sorted(expected), sorted(self.q.list()))
+        with database.transaction():
+            self.q.insert(self.acl, self.device_list)
+            self.q.remove(self.acl, self.device_list)
+            expected = []
+            self.assertEqual(expected, self.q.list())
 
     def test_10_remove_integrated_failure(self):
         """Test remove (set as loaded) failure"""
@@ -121,17 +134,19 @@ class TestAclQueue(unittest.TestCase):
 
     def test_12_list_manual_success(self):
         """Test list success of manual queue"""
-        self.q.insert('manual task', None)
-        expected = ('manual task', self.user)
-        result = self.q.list('manual')
-        actual = result[0][:2] # First tuple, items 0-1
-        self.assertEqual(sorted(expected), sorted(actual))
+        with database.transaction():
+            self.q.insert('manual task', None)
+            expected = ('manual task', self.user)
+            result = self.q.list('manual')
+            actual = result[0][:2] # First tuple, items 0-1
+            self.assertEqual(expected, actual)
 
     def test_13_delete_manual_success(self):
         """Test delete from manual queue"""
-        self.q.delete('manual task')
-        expected = []
-        self.assertEqual(sorted(expected), sorted(self.q.list('manual')))
+        with database.transaction():
+            self.q.delete('manual task')
+            expected = []
+            self.assertEqual(expected, self.q.list('manual'))
 
     #
     # Generic tests
@@ -145,13 +160,8 @@ class TestAclQueue(unittest.TestCase):
         """Test list of invalid queue name"""
         self.assertFalse(self.q.list('bogus'))
 
-    # Teardown
-
-    def test_ZZ_cleanup_db(self):
-        """Cleanup the temp database file"""
-        self.assertTrue(os.remove(db_file) is None)
-
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         NetDevices._Singleton = None
 
 if __name__ == '__main__':
@@ -28,8 +28,9 @@ filter fire1 {
     }
 }
 '''
-y = acl.parse(PARSIT)
-print y.terms[0].match
-print '\n'.join(acl.parse(PARSIT).output_junos())
-# following should fail
-#print '\n'.join(acl.parse(PARSIT).output_ios())
+if __name__ == '__main__':
+    y = acl.parse(PARSIT)
+    print y.terms[0].match
+    print '\n'.join(y.output_junos())
+    # following should fail
+    #print '\n'.join(y.output_ios())
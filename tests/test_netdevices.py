@@ -23,14 +23,36 @@ mock_redis.install()
 
 # Now we can import from Trigger
 from trigger.netdevices import NetDevices, NetDevice, Vendor
+from trigger.netdevices.loaders.filesystem import XMLLoader
+from trigger.conf import settings
 from trigger import changemgmt
 
 
 # Constants
+# Tests that make real network probes (and so wait on DNS and connect
+# timeouts) only run when this is set in the environment.
+SLOW_TESTS = os.environ.get('TRIGGER_SLOW_TESTS')
 DEVICE_NAME = 'test1-abc.net.aol.com'
 DEVICE2_NAME = 'test2-abc.net.aol.com'
-NETDEVICE_DUMP_EXPECTED = \
-'\n\tHostname:          test1-abc.net.aol.com\n\tOwning Org.:       12345678 - Network Engineering\n\tOwning Team:       Data Center\n\tOnCall Team:       Data Center\n\n\tVendor:            Juniper (JUNIPER)\n\tMake:              M40 INTERNET BACKBONE ROUTER\n\tModel:             M40-B-AC\n\tType:              ROUTER\n\tLocation:          LAB CR10 16ZZ\n\n\tProject:           Test Lab\n\tSerial:            987654321\n\tAsset Tag:         0000012345\n\tBudget Code:       1234578 (Data Center)\n\n\tAdmin Status:      PRODUCTION\n\tLifecycle Status:  INSTALLED\n\tOperation Status:  MONITORED\n\tLast Updated:      2010-07-19 19:56:32.0\n\n'
+NETDEVICE_DUMP_EXPECTED = {
+    'Hostname': 'test1-abc.net.aol.com',
+    'Owning Org.': '12345678 - Network Engineering',
+    'Owning Team': 'Data Center',
+    'OnCall Team': 'Data Center',
+    'Vendor': 'Juniper (JUNIPER)',
+    'Make': 'M40 INTERNET BACKBONE ROUTER',
+    'Model': 'M40-B-AC',
+    'Type': 'ROUTER',
+    'Location': 'LAB CR10 16ZZ',
+    'Project': 'Test Lab',
+    'Serial': '987654321',
+    'Asset Tag': '0000012345',
+    'Budget Code': '1234578 (Data Center)',
+    'Admin Status': 'PRODUCTION',
+    'Lifecycle Status': 'INSTALLED',
+    'Operation Status': 'MONITORED',
+    'Last Updated': '2010-07-19 19:56:32.0',
+}
 
 
 def _reset_netdevices():
@@ -42,8 +64,14 @@ class TestNetDevicesWithAcls(unittest.TestCase):
     """
     Test NetDevices with ``settings.WITH_ACLs set`` to ``True``.
     """
+    @classmethod
+    def setUpClass(cls):
+        # Load the devices once; tests that change them put them back.
+        _reset_netdevices()
+        cls._nd = NetDevices()
+
     def setUp(self):
-        self.nd = NetDevices()
+        self.nd = self._nd
         self.device = self.nd[DEVICE_NAME]
         self.device2 = self.nd[DEVICE2_NAME]
         self.nodename = self.device.nodeName
@@ -73,7 +101,7 @@ class TestNetDevicesWithAcls(unittest.TestCase):
     def test_all(self):
         """Test the all() method."""
         expected = [self.device, self.device2]
-        self.assertEqual(sorted(expected), sorted(self.nd.all()))
+        self.assertEqual(set(expected), set(self.nd.all()))
 
     def test_search(self):
         """Test the search() method."""
@@ -103,6 +131,7 @@ class TestNetDevicesWithAcls(unittest.TestCase):
 
     def test_match_with_null_value(self):
         """Test the match() method when attr value is ``None``."""
+        self.addCleanup(setattr, self.device, 'site', self.device.site)
         self.device.site = None  # Zero it out!
         expected = [self.device]
 
@@ -121,7 +150,8 @@ class TestNetDevicesWithAcls(unittest.TestCase):
         nd.reload()
         self.assertEqual(nd, self.nd)
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         _reset_netdevices()
 
 
@@ -129,8 +159,13 @@ class TestNetDevicesWithoutAcls(unittest.TestCase):
     """
     Test NetDevices with ``settings.WITH_ACLs`` set to ``False``.
     """
+    @classmethod
+    def setUpClass(cls):
+        _reset_netdevices()
+        cls._nd = NetDevices(with_acls=False)
+
     def setUp(self):
-        self.nd = NetDevices(with_acls=False)
+        self.nd = self._nd
         self.nodename = self.nd.keys()[0]
         self.device = self.nd.values()[0]
 
@@ -143,7 +178,8 @@ class TestNetDevicesWithoutAcls(unittest.TestCase):
         expected = set()
         self.assertEqual(expected, self.device.implicit_acls)
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         _reset_netdevices()
 
 
@@ -151,9 +187,15 @@ class TestNetDeviceObject(unittest.TestCase):
     """
     Test NetDevice object methods.
     """
+    @classmethod
+    def setUpClass(cls):
+        _reset_netdevices()
+        cls._nd = NetDevices()
+        cls._device = cls._nd[DEVICE_NAME]
+
     def setUp(self):
-        self.nd = NetDevices()
-        self.device = self.nd[DEVICE_NAME]
+        self.nd = self._nd
+        self.device = self._device
         self.nodename = self.device.nodeName
 
     def test_stringify(self):
@@ -193,6 +235,7 @@ class TestNetDeviceObject(unittest.TestCase):
         self.assertFalse(self.device.is_ioslike())
         self.assertFalse(self.device.is_brocade_vdx())
 
+    @unittest.skipUnless(SLOW_TESTS, 'network probe; set TRIGGER_SLOW_TESTS')
     def test_hash_ssh(self):
         """Exercise NetDevice ssh test."""
         # TODO (jathan): Mock SSH connections so we can test actual connectivity
@@ -201,6 +244,7 @@ class TestNetDeviceObject(unittest.TestCase):
         # Since there's no SSH, no aync
         self.assertFalse(self.device.can_ssh_pty())
 
+    @unittest.skipUnless(SLOW_TESTS, 'network probe; set TRIGGER_SLOW_TESTS')
     def test_reachability(self):
         """Exercise NetDevice ssh test."""
         # TODO (jathan): Mock SSH connections so we can test actual connectivity
@@ -211,18 +255,24 @@ class TestNetDeviceObject(unittest.TestCase):
         with captured_output() as (out, err):
             self.device.dump()
         expected = NETDEVICE_DUMP_EXPECTED
-        output = out.getvalue()
+        output = {}
+        for line in out.getvalue().splitlines():
+            field, sep, value = line.partition(':')
+            if sep:
+                output[field.strip()] = value.strip()
         self.assertEqual(expected, output)
 
     def test_os(self):
-        self.nd = NetDevices()
-        self.device = self.nd[DEVICE_NAME]
+        # Put the shared device back the way we found it afterwards.
+        saved = self.device.__dict__.copy()
+        self.addCleanup(self.device.__dict__.update, saved)
+        self.addCleanup(self.device.__dict__.clear)
         self.device.vendor = "cisco"
         self.device.operatingSystem = "NXOS"
-        self.nodename = self.device.nodeName
         self.assertEquals("cisco_nxos", self.device.os)
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         _reset_netdevices()
 
 
@@ -265,5 +315,34 @@ class TestVendorObject(unittest.TestCase):
         self.assertEqual(expected, self.vendor.determine_vendor(self.mfr))
 
 
+class TestXMLLoader(unittest.TestCase):
+    """Test the opt-in parse cache of the XML loader."""
+    def setUp(self):
+        self.source = settings.NETDEVICES_SOURCE
+        XMLLoader.reset()
+
+    def test_cached_parse(self):
+        """Test that an unchanged file is parsed only once."""
+        loader = XMLLoader(cache=True)
+        first = [list(node) for node in loader.get_data(self.source)]
+        nodes = XMLLoader._last[3]
+        second = [list(node) for node in loader.get_data(self.source)]
+        self.assertEqual(first, second)
+        self.assertTrue(nodes is XMLLoader._last[3])
+
+    def test_uncached_parse(self):
+        """Test that the cache is off by default."""
+        loader = XMLLoader()
+        cached = [list(node) for node in
+                  XMLLoader(cache=True).get_data(self.source)]
+        XMLLoader.reset()
+        self.assertEqual(cached,
+                         [list(node) for node in loader.get_data(self.source)])
+        self.assertEqual(None, XMLLoader._last)
+
+    def tearDown(self):
+        XMLLoader.reset()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -8,22 +8,32 @@ __maintainer__ = 'Jathan McCollum'
 __copyright__ = 'Copyright 2005-2011 AOL Inc.'
 __version__ = '1.1'
 
-import os
+from cStringIO import StringIO
+import imp
 import unittest
 
 ACLCONV = 'bin/aclconv'
 
-os.environ['PYTHONPATH'] = os.getcwd()
-
 # TODO (jathan): Add tests for all the scripts!!
 
 class Aclconv(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Run the script in-process instead of paying for a new interpreter
+        # on every test.
+        cls.aclconv = imp.load_source('aclconv', ACLCONV)
+
+    def run_aclconv(self, argv, text):
+        """Run aclconv with ``text`` on stdin and return its output."""
+        out = StringIO()
+        self.aclconv.main(argv, stdin=StringIO(text), stdout=out)
+        return out.getvalue()
+
     # This should be expanded.
     def testI2J(self):
         """Convert IOS to JunOS."""
-        child_in, child_out = os.popen2(ACLCONV + ' -j -')
-        child_in.write('access-list 100 deny ip any any')
-        self.assertEqual(child_in.close(), None)
+        output = self.run_aclconv(['-j', '-'],
+                                  'access-list 100 deny ip any any')
         correct_output = '''\
 firewall {
 replace:
@@ -37,8 +47,7 @@ replace:
     }
 }
 '''
-        self.assertEqual(child_out.read(), correct_output)
-        self.assertEqual(child_out.close(), None)
+        self.assertEqual(output, correct_output)
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,6 +9,8 @@ __version__ = '2.0.1'
 
 from StringIO import StringIO
 import os
+import re
+import stat
 import unittest
 import tempfile
 from mock import patch
@@ -22,7 +24,7 @@ AOL_TACACSRC = {
     'aol_uname_': 'jschmoe',
     'aol_pwd_': 'abc123',
 }
-RIGHT_PERMS = '0600'
+RIGHT_PERMS = 0600
 
 MEDIUMPWCREDS = Credentials('MEDIUMPWCREDS', 'MEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUMMEDIUM', 'MEDIUMPWCREDS')
 MEDIUMPW_TACACSRC = {
@@ -42,21 +44,22 @@ EMPTYPW_TACACSRC = {
    'EMPTYPWCREDS_pwd_': '',
 }
 
-LIST_OF_CREDS = ['aol', 'MEDIUMPWCREDS', 'LONGPWCREDS', ]  
-LIST_OF_TACACSRC = [ AOL_TACACSRC, MEDIUMPW_TACACSRC, LONGPW_TACACSRC ]  
-ALL_CREDS = [ (name,eval(name)) for name in LIST_OF_CREDS] 
-ALL_TACACSRC = dict() 
-[ALL_TACACSRC.update(x) for x in LIST_OF_TACACSRC]
-
-def miniparser(data, tcrc):
-    """Manually parse .tacacsrc lines into a dict"""
-    lines = [line.strip() for line in data]
-    lines = [line for line in lines if line and not line.startswith('#')]
-    ret = {}
-    for line in lines:
-        k, _, v = line.partition(' = ')
-        ret[k] = tcrc._decrypt_old(v)
-    return ret
+ALL_CREDS = [
+    ('aol', aol),
+    ('MEDIUMPWCREDS', MEDIUMPWCREDS),
+    ('LONGPWCREDS', LONGPWCREDS),
+]
+ALL_TACACSRC = dict(AOL_TACACSRC)
+ALL_TACACSRC.update(MEDIUMPW_TACACSRC)
+ALL_TACACSRC.update(LONGPW_TACACSRC)
+
+# A non-comment "key = value" line of a .tacacsrc
+TACACSRC_LINE = re.compile(r'^[ \t]*([^#\s]\S*) = ?(.*?)[ \t]*$', re.M)
+
+def miniparser(text, tcrc):
+    """Manually parse .tacacsrc text into a dict"""
+    return dict((k, tcrc._decrypt_old(v))
+                for k, v in TACACSRC_LINE.findall(text))
 
 class Testing_Tacacsrc(Tacacsrc):
     def _get_key_nonce_old(self):
@@ -72,9 +75,8 @@ class TacacsrcTest(unittest.TestCase):
           self.assertEqual(t.creds['%s' % name], value)
 
     def _get_perms(self, filename):
-        """Get octal permissions for a filename"""
-        # We only want the lower 4 bits (negative index)
-        return oct(os.stat(filename).st_mode)[-4:]
+        """Get permission bits for a filename"""
+        return stat.S_IMODE(os.stat(filename).st_mode)
 
     def testWrite(self):
         """Test writing .tacacsrc."""
@@ -85,20 +87,20 @@ class TacacsrcTest(unittest.TestCase):
           t.creds['%s' % name] = value
         # Overload the default file_name w/ our temp file or
         # create a new tacacsrc by setting file_name to 'tests/data/tacacsrc'
-          t.file_name = file_name 
-          t.write()
+        t.file_name = file_name
+        t.write()
 
         # Read the file we wrote back in and check it against what we think it
         # should look like.
         self.maxDiff = None 
-        output = miniparser(t._read_file_old(), t)
+        output = miniparser(''.join(t._read_file_old()), t)
         self.assertEqual(output, ALL_TACACSRC) 
 
         # And then compare it against the manually parsed value using
         # miniparser()
         with open(settings.TACACSRC, 'r') as fd:
-            lines = fd.readlines()
-            self.assertEqual(output, miniparser(lines, t))
+            expected = miniparser(fd.read(), t)
+        self.assertEqual(output, expected)
         os.remove(file_name)
 
     def test_brokenpw(self):
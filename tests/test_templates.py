@@ -103,21 +103,35 @@ def _reset_netdevices():
 class CheckTemplates(unittest.TestCase):
     """Test structured CLI object data."""
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         data = cStringIO.StringIO(text_fsm_data)
-        self.re_table = textfsm.TextFSM(data)
-        self.assertTrue(isinstance(self.re_table, textfsm.textfsm.TextFSM))
+        cls.re_table = textfsm.TextFSM(data)
+
+        cls.nd = NetDevices()
+        cls.device = cls.nd[DEVICE_NAME]
+        cls.device.vendor = "cisco"
+        cls.device.operatingSystem = "ios"
 
-        self.nd = NetDevices()
-        self.device = self.nd[DEVICE_NAME]
-        self.device.vendor = "cisco"
-        self.device.operatingSystem = "ios"
+    def setUp(self):
+        self.re_table.Reset()
+        self.assertTrue(isinstance(self.re_table, textfsm.textfsm.TextFSM))
 
     def testTemplatePath(self):
         """Test that template path is correct."""
         t_path = get_template_path("show clock", dev_type="cisco_ios")
         self.failUnless("vendor/ntc_templates/cisco_ios_show_clock.template" in t_path)
 
+    def testLoadCmdTemplateFresh(self):
+        """Test that each template load returns its own TextFSM object."""
+        re_table = load_cmd_template("show version", dev_type="cisco_ios")
+        self.assertTrue(isinstance(re_table, textfsm.textfsm.TextFSM))
+        first = get_textfsm_object(re_table, big_cli_data)
+        again = load_cmd_template("show version", dev_type="cisco_ios")
+        self.assertFalse(again is re_table)
+        self.assertEquals(again._result, [])
+        self.assertEquals(get_textfsm_object(again, big_cli_data), first)
+
     def testGetTextFsmObject(self):
         """Test that we get structured data back from cli output."""
         data = get_textfsm_object(self.re_table, cli_data)
@@ -145,7 +159,8 @@ class CheckTemplates(unittest.TestCase):
         self.assertTrue(isinstance(data[0], str))
         self.assertEquals(commando.parsed_results, {})
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         _reset_netdevices()
 
 if __name__ == "__main__":
@@ -1,16 +1,18 @@
 
 
-import re
-
 import pytest
 
 from trigger.conf import settings
+from trigger import twister
+
+
+# Constants
+IOSLIKE_PROMPT = twister.compile_prompt_pattern(settings.IOSLIKE_PROMPT_PAT)
+IOSLIKE_ENABLE = twister.compile_prompt_pattern(settings.IOSLIKE_ENABLE_PAT)
 
 
 def test_ioslike_prompt_pattern_enabled():
     """Test enabled that IOS-like prompt patterns match correctly."""
-    pat = settings.IOSLIKE_PROMPT_PAT
-
     prompt_tests = [
         'foo-bar1#',
         'foo-bar1# ',
@@ -20,13 +22,11 @@ def test_ioslike_prompt_pattern_enabled():
     ]
 
     for prompt in prompt_tests:
-        assert re.search(pat, prompt) is not None
+        assert IOSLIKE_PROMPT.search(prompt) is not None
 
 
 def test_ioslike_prompt_pattern_nonenabled():
     """Test non-enabled that IOS-like prompt patterns match correctly."""
-    pat = settings.IOSLIKE_ENABLE_PAT
-
     prompt_tests = [
         'foo-bar1>',
         'foo-bar1> ',
@@ -35,4 +35,55 @@ def test_ioslike_prompt_pattern_nonenabled():
     ]
 
     for prompt in prompt_tests:
-        assert re.search(pat, prompt) is not None
+        assert IOSLIKE_ENABLE.search(prompt) is not None
+
+
+def test_compile_prompt_pattern_cached():
+    """Test that prompt patterns are compiled once and shared."""
+    pat = settings.IOSLIKE_PROMPT_PAT
+    compiled = twister.compile_prompt_pattern(pat)
+    assert compiled.pattern == pat
+    assert twister.compile_prompt_pattern(pat) is compiled
+    assert twister.compile_prompt_pattern(compiled) is compiled
+
+
+def test_vendor_prompt_patterns_shared():
+    """Test that each vendor prompt pattern is compiled once and shared."""
+    for pat in settings.PROMPT_PATTERNS.values():
+        compiled = twister.compile_prompt_pattern(pat)
+        assert twister.compile_prompt_pattern(pat) is compiled
+
+
+def test_is_awaiting_confirmation():
+    """Test that continue prompts are matched at the end of the buffer."""
+    assert twister.is_awaiting_confirmation(
+        'foo\nDestination filename [running-config]? ')
+    assert twister.is_awaiting_confirmation('Proceed? [confirm]')
+    assert twister.is_awaiting_confirmation('Really PROCEED?')
+    assert not twister.is_awaiting_confirmation('continue? no\nfoo-bar1#')
+    assert not twister.is_awaiting_confirmation('')
+
+
+def test_search_prompt_tail():
+    """Test that prompt searches over the buffer tail match a full search."""
+    output = 'interface GigabitEthernet0/1\r\n description foo\r\n' * 50
+    for received in ('foo-bar1#', '\r\nfoo-bar1(config)# ', output + '#'):
+        data = output + received
+        m = twister.search_prompt(IOSLIKE_PROMPT, data, received)
+        expected = IOSLIKE_PROMPT.search(data)
+        assert m.start() == expected.start()
+        assert m.group() == expected.group()
+    assert twister.search_prompt(IOSLIKE_PROMPT, output, output[-10:]) is None
+
+    # Not anchored at the end, so the whole buffer is searched
+    unanchored = twister.compile_prompt_pattern(r'\S+[#\$]|->\s?$')
+    data = 'foo#' + output
+    m = twister.search_prompt(unanchored, data, output[-10:])
+    assert m.start() == 0
+
+
+def test_is_end_anchored():
+    """Test which prompt patterns are treated as anchored to the end."""
+    assert twister._is_end_anchored(IOSLIKE_PROMPT)
+    for pat in (r'\S+[#\$]|->\s?$', r'\S+\$', r'(?m)\S+#$', r'(\S+#$)'):
+        assert not twister._is_end_anchored(twister.compile_prompt_pattern(pat))
@@ -9,10 +9,27 @@ Modified for Trigger by Jathan McCollum
 __all__ = ('Redis', 'MockRedis', 'install')
 
 
-from collections import defaultdict
 import re
 import sys
 
+
+# Compiled regexes for keys() patterns, keyed by pattern
+_key_patterns = {}
+
+
+def _key_pattern(pattern):
+    """
+    Make a regex out of a keys() pattern. The only special matching character
+    we look for is '*'.
+    """
+    try:
+        return _key_patterns[pattern]
+    except KeyError:
+        regex = '^' + re.escape(pattern).replace(r'\*', '.*') + '$'
+        compiled = _key_patterns[pattern] = re.compile(regex)
+        return compiled
+
+
 class MockRedisLock(object):
     """
     Poorly imitate a Redis lock object so unit tests can run on our Hudson CI
@@ -42,24 +59,46 @@ class MockRedisPipeline(object):
     def __init__(self, redis):
         """Initialize the object."""
         self.redis = redis
+        self.results = []
 
     def execute(self):
         """
         Emulate the execute method. All piped commands are executed immediately
-        in this mock, so this is a no-op.
+        in this mock, so this just hands back their results.
         """
-        pass
+        results, self.results = self.results, []
+        return results
 
     def delete(self, key):
         """Emulate a pipelined delete."""
 
         # Call the MockRedis' delete method
-        self.redis.delete(key)
+        self.results.append(self.redis.delete(key))
+        return self
+
+    def sadd(self, key, *members):
+        """Emulate a pipelined sadd."""
+        self.results.append(self.redis.sadd(key, *members))
         return self
 
     def srem(self, key, member):
-        """Emulate a pipelined simple srem."""
-        self.redis.redis[key].discard(member)
+        """Emulate a pipelined srem."""
+        self.results.append(self.redis.srem(key, member))
+        return self
+
+    def smembers(self, key):
+        """Emulate a pipelined smembers."""
+        self.results.append(self.redis.smembers(key))
+        return self
+
+    def save(self):
+        """Emulate a pipelined save."""
+        self.results.append(self.redis.save())
+        return self
+
+    def bgsave(self):
+        """Emulate a pipelined bgsave."""
+        self.results.append(self.redis.bgsave())
         return self
 
 class MockRedis(object):
@@ -67,8 +106,9 @@ class MockRedis(object):
     Imitate a Redis object so unit tests can run on our Hudson CI server without
     needing a real Redis server.
     """
-    # The 'Redis' store
-    redis = defaultdict(dict)
+    # The 'Redis' store. It's shared like a real Redis server, and a plain
+    # dict so that reading a missing key doesn't create it.
+    redis = {}
 
     def __init__(self):
         """Initialize the object."""
@@ -85,84 +125,86 @@ class MockRedis(object):
 
     def get(self, key):  # pylint: disable=R0201
         """Emulate get."""
-        # Override the default dict
-        result = '' if key not in MockRedis.redis else MockRedis.redis[key]
-        return result
+        return MockRedis.redis.get(key, '')
 
     def hget(self, hashkey, attribute):  # pylint: disable=R0201
         """Emulate hget."""
-        # Return '' if the attribute does not exist
-        result = MockRedis.redis[hashkey].get(attribute, '')
-        return result
+        # Return '' if the hash or attribute does not exist
+        return MockRedis.redis.get(hashkey, {}).get(attribute, '')
 
     def hgetall(self, hashkey):  # pylint: disable=R0201
         """Emulate hgetall."""
-        return MockRedis.redis[hashkey]
+        return MockRedis.redis.get(hashkey, {})
 
     def hlen(self, hashkey):  # pylint: disable=R0201
         """Emulate hlen."""
-        return len(MockRedis.redis[hashkey])
+        return len(MockRedis.redis.get(hashkey, {}))
 
     def hmset(self, hashkey, value):  # pylint: disable=R0201
         """Emulate hmset."""
-        # Iterate over every key:value in the value argument.
-        for attributekey, attributevalue in value.items():
-            MockRedis.redis[hashkey][attributekey] = attributevalue
+        MockRedis.redis.setdefault(hashkey, {}).update(value)
 
     def hset(self, hashkey, attribute, value):  # pylint: disable=R0201
         """Emulate hset."""
-        MockRedis.redis[hashkey][attribute] = value
+        MockRedis.redis.setdefault(hashkey, {})[attribute] = value
 
     def keys(self, pattern):  # pylint: disable=R0201
         """Emulate keys."""
+        if pattern == '*':
+            return MockRedis.redis.keys()
 
-        # Make a regex out of pattern. The only special matching character we look for is '*'
-        regex = '^' + pattern.replace('*', '.*') + '$'
+        # A single trailing '*' is just a prefix match
+        prefix = pattern[:-1]
+        if pattern.endswith('*') and '*' not in prefix:
+            return [key for key in MockRedis.redis if key.startswith(prefix)]
 
         # Find every key that matches the pattern
-        result = [key for key in MockRedis.redis.keys() if re.match(regex, key)]
+        regex = _key_pattern(pattern)
+        result = [key for key in MockRedis.redis if regex.match(key)]
 
         return result
 
+    def scan_iter(self, match=None, count=None):  # pylint: disable=W0613
+        """Emulate scan_iter."""
+        return iter(self.keys(match or '*'))
+
     def lock(self, key, timeout=0, sleep=0):  # pylint: disable=W0613
         """Emulate lock."""
         return MockRedisLock(self, key)
 
-    def pipeline(self):
+    def pipeline(self, transaction=True):  # pylint: disable=W0613
         """Emulate a redis-python pipeline."""
         return MockRedisPipeline(self)
 
-    def sadd(self, key, value):  # pylint: disable=R0201
-        """Emulate sadd."""
-        # Does the set at this key already exist?
-        if key in MockRedis.redis:
-            # Yes, add this to the set
-            if value in MockRedis.redis[key]:
-                return False
-            MockRedis.redis[key].add(value)
-        else:
-            # No, override the defaultdict's default and create the set
-            MockRedis.redis[key] = set([value])
-        return True
+    def sadd(self, key, *values):  # pylint: disable=R0201
+        """Emulate sadd. Returns how many values were added."""
+        # Create the set at this key if it doesn't exist yet
+        members = MockRedis.redis.setdefault(key, set())
+        before = len(members)
+        members.update(values)
+        return len(members) - before
 
     def srem(self, key, value):
         """Emulate srem."""
-        # Does the set at this key already exist?
-        if key in MockRedis.redis:
-            # Yes, remove it from the set
-            if value in MockRedis.redis[key]:
-                MockRedis.redis[key].discard(value)
-                return True
-        return False
+        members = MockRedis.redis.get(key)
+        if members is None or value not in members:
+            return False
+        members.discard(value)
+        return True
 
     def smembers(self, key):  # pylint: disable=R0201
         """Emulate smembers."""
-        return MockRedis.redis[key]
+        # Like Redis, a missing key is an empty set (and stays missing)
+        return MockRedis.redis.get(key, set())
 
     def save(self):
         """Emulate save"""
         return True
 
+    def bgsave(self):
+        """Emulate bgsave"""
+        return True
+
 class Redis(MockRedis):
     """Redis object that supports kwargs"""
     def __init__(self, **kwargs):
@@ -10,7 +10,7 @@ __email__ = 'jathan.mccollum@teamaol.com'
 __copyright__ = 'Copyright 2006-2011, AOL Inc.'
 __version__ = '1.9'
 
-from trigger.tacacsrc import *
+from trigger.tacacsrc import Tacacsrc
 
 t = Tacacsrc()
 if hasattr(t, 'rawdata'):
@@ -3,7 +3,7 @@
 # nd2json.py - Converts netdevices.xml to netdevices.json and reports
 # performance stuff
 
-from xml.etree.cElementTree import ElementTree, parse
+from xml.etree.cElementTree import iterparse
 try:
     import simplejson as json
 except ImportError:
@@ -12,49 +12,44 @@ import sys
 import time
 
 
+# The same as iter_devices() in nd2sqlite.py. Both converters are standalone
+# scripts that run on import, so neither can import the other; keep the two
+# copies identical.
+def iter_devices(ndfile):
+    """
+    Yield each <device> element of ndfile as it's parsed, clearing it from
+    the tree once the caller is done with it.
+    """
+    context = iterparse(ndfile, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'device':
+            yield elem
+            root.clear()
+
+
 if len(sys.argv) < 2:
     sys.exit("usage: %s </path/to/netdevices.xml>" % sys.argv[0])
 else:
     ndfile = sys.argv[1]
 
-print # Parse XML
-print 'Parsing XML', ndfile
-start = time.time()
-nodes = parse(ndfile).findall('device')
-print 'Done:', time.time() - start, 'seconds.'
-devices = []
-
-print # Convert to Python structure
-
-print 'Converting to Python structure.'
-start = time.time()
-for node in nodes:
-    dev = {}
-    for e in node.getchildren():
-        dev[e.tag] = e.text
-    devices.append(dev)
-print 'Done:', time.time() - start, 'seconds.'
-
-print # Convert to JSON
-
-'''
-print 'Dumping to JSON...'
-start = time.time()
-jsondata = json.dumps(devices)
-print 'Done:', time.time() - start, 'seconds.'
-'''
-
-print # Writing to file
+print # Parse XML, convert to Python structure and write JSON to file
 
+# Each device is written out as soon as it's parsed, so neither the XML tree
+# nor the list of devices is ever held in memory.
 outfile = 'netdevices.json'
 with open(outfile, 'wb') as f:
-    print 'Writing to disk...'
+    print 'Converting', ndfile, 'and writing to disk...'
     start = time.time()
-    json.dump(devices, f, ensure_ascii=False, check_circular=False, indent=4)
-    #json.dump(devices, f, ensure_ascii=False, check_circular=False)
-    #f.write(jsondata)
+    sep = '[\n    '
+    for node in iter_devices(ndfile):
+        dev = {e.tag: e.text for e in node}
+        devjson = json.dumps(dev, ensure_ascii=False, check_circular=False,
+                             indent=4)
+        f.write(sep + devjson.replace('\n', '\n    '))
+        sep = ', \n    '
+    f.write('[]' if sep.startswith('[') else '\n]')
     print 'Done:', time.time() - start, 'seconds.'
-    #print 'Wrote {0} bytes to {1}'.format(len(jsondata), outfile)
 
 print # Reading from file
 
@@ -3,46 +3,69 @@
 # nd2sqlite.py - Converts netdevices.xml into a SQLite database and also prints
 # some performance stuff
 
-from xml.etree.cElementTree import ElementTree, parse
-try:
-    import simplejson as json
-except ImportError:
-    import json
+from xml.etree.cElementTree import iterparse
 import time
 import sys
 import sqlite3 as sqlite
 
+# How many rows to insert per executemany() call
+BATCH_SIZE = 10000
+
+
+# The same as iter_devices() in nd2json.py. Both converters are standalone
+# scripts that run on import, so neither can import the other; keep the two
+# copies identical.
+def iter_devices(ndfile):
+    """
+    Yield each <device> element of ndfile as it's parsed, clearing it from
+    the tree once the caller is done with it.
+    """
+    context = iterparse(ndfile, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'device':
+            yield elem
+            root.clear()
+
+
 if len(sys.argv) < 3:
     sys.exit("usage: %s </path/to/netdevices.xml> </path/to/sqlite-db-file>" % sys.argv[0])
 else:
     ndfile = sys.argv[1]
     sqlitefile = sys.argv[2]
 
-print # Parse XML
-print 'Parsing XML', ndfile
-start = time.time()
-nodes = parse(ndfile).findall('device')
-print 'Done:', time.time() - start, 'seconds.'
-#devices = []
-
 connection = sqlite.connect(sqlitefile)
 cursor = connection.cursor()
 
-print # Convert to Python structure
+print # Parse XML and insert into the database
 
-print 'Inserting into sqlite...'
+print 'Parsing XML', ndfile, 'and inserting into sqlite...'
 start = time.time()
-for node in nodes:
-    keys = []
-    vals = []
-    for e in node.getchildren():
-        keys.append(e.tag)
-        vals.append(e.text)
-    keystr = ', '.join(keys)
-    valstr = ','.join('?' * len(vals))
-    #sql = ''' INSERT INTO netdevices ( {0}) VALUES ( {1}); '''.format(keystr, valstr)
-    sql = '''INSERT INTO netdevices ( {0} ) VALUES ( {1} )'''.format(keystr, valstr)
-    cursor.execute(sql, vals)
+# Rows are grouped by their columns so that each INSERT is built once and run
+# for many rows at a time with executemany(). All devices usually have the
+# same columns, so this is normally a single statement.
+statements = {}
+pending = {}
+for node in iter_devices(ndfile):
+    children = list(node)
+    keys = tuple(e.tag for e in children)
+    vals = [e.text for e in children]
+    if keys not in statements:
+        keystr = ', '.join(keys)
+        valstr = ','.join('?' * len(keys))
+        #sql = ''' INSERT INTO netdevices ( {0}) VALUES ( {1}); '''.format(keystr, valstr)
+        statements[keys] = '''INSERT INTO netdevices ( {0} ) VALUES ( {1} )'''.format(keystr, valstr)
+        pending[keys] = []
+    rows = pending[keys]
+    rows.append(vals)
+    # Cap how many rows are held in memory
+    if len(rows) >= BATCH_SIZE:
+        cursor.executemany(statements[keys], rows)
+        del rows[:]
+
+for keys, rows in pending.iteritems():
+    if rows:
+        cursor.executemany(statements[keys], rows)
 
 connection.commit()
 
@@ -33,6 +33,9 @@ __all__ = ('autoacl',)
 
 module_path = settings.AUTOACL_FILE
 
+# Shared result for the default autoacl(), so we don't allocate per device.
+_EMPTY = frozenset()
+
 
 # In either case we're exporting a single name: autoacl().
 try:
@@ -51,8 +54,9 @@ except ImportError:
         require a device object so that we don't have circular dependencies
         between netdevices and autoacl.
 
-        This function MUST return a ``set()`` of acl names or you will break
-        the ACL associations. An empty set is fine, but it must be a set!
+        This function MUST return a ``set()`` or ``frozenset()`` of acl names
+        or you will break the ACL associations. An empty set is fine, but it
+        must be a set! Callers must not mutate the result; copy it first.
 
         :param dev: A :class:`~trigger.netdevices.NetDevice` object.
         :param explicit_acls: A set containing names of ACLs. Default: set()
@@ -66,4 +70,4 @@ except ImportError:
         NOTE: If the default function is returned it does nothing with the
         arguments and always returns an empty set.
         """
-        return set()
+        return _EMPTY
@@ -26,6 +26,7 @@ __maintainer__ = 'Jathan McCollum'
 __email__ = 'jathan@gmail.com'
 __copyright__ = 'Copyright 2010-2012, AOL Inc.; 2013 Salesforce.com'
 
+import bisect
 from collections import defaultdict
 import redis
 import sys
@@ -39,6 +40,12 @@ from trigger.conf import settings
 ACLSDB_BACKUP = './acls.csv'
 DEBUG = False
 
+# The ACL sets that AclsDB.get_acl_set() can return
+ACL_SETS = frozenset(['all', 'explicit', 'implicit'])
+
+# How many commands to queue in a pipeline before sending them to Redis
+PIPELINE_SIZE = 10000
+
 # The redis instance. It doesn't care if it can't reach Redis until you actually
 # try to talk to Redis.
 r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
@@ -63,9 +70,20 @@ class AclsDB(object):
     Container for ACL operations.
 
     add/remove operations are for explicit associations only.
+
+    Each device's associations are read from Redis once per AclsDB and then
+    cached, so the cache reflects a single load. Only this instance's own
+    add_acl() and remove_acl() refresh it; changes made through another
+    AclsDB, by populate_explicit_acls(), or by another process aren't seen
+    until a new AclsDB is created. get_acl_set(device, 'explicit') is the
+    exception: it always reads the explicit associations from Redis.
     """
     def __init__(self):
         self.redis = r
+        # Maps nodeName to (explicit, implicit, all) frozensets. Entries are
+        # dropped when add_acl() or remove_acl() changes a device. Callers
+        # get mutable copies, never these sets.
+        self._acl_dict_cache = {}
         log.msg('ACLs database client initialized')
 
     def add_acl(self, device, acl):
@@ -76,13 +94,15 @@ class AclsDB(object):
         >>> a.add_acl(dev, 'acb123')
         'added acl abc123 to test1-mtc.net.aol.com'
         """
+        # No SAVE here: a synchronous dump on every change stalls Redis, and
+        # durability is left to the server's own persistence settings.
         try:
             rc = self.redis.sadd('acls:explicit:%s' % device.nodeName, acl)
         except redis.exceptions.ResponseError as err:
             return str(err)
         if rc != 1:
             raise exceptions.ACLSetError('%s already has acl %s' % (device.nodeName, acl))
-        self.redis.save()
+        self._acl_dict_cache.pop(device.nodeName, None)
 
         return 'added acl %s to %s' % (acl, device)
 
@@ -93,13 +113,15 @@ class AclsDB(object):
         >>> a.remove_acl(dev, 'acb123')
         'removed acl abc123 from test1-mtc.net.aol.com'
         """
+        # No SAVE here: a synchronous dump on every change stalls Redis, and
+        # durability is left to the server's own persistence settings.
         try:
             rc = self.redis.srem('acls:explicit:%s' % device.nodeName, acl)
         except redis.exceptions.ResponseError as err:
             return str(err)
         if rc != 1:
             raise exceptions.ACLSetError('%s does not have acl %s' % (device.nodeName, acl))
-        self.redis.save()
+        self._acl_dict_cache.pop(device.nodeName, None)
 
         return 'removed acl %s from %s' % (acl, device)
 
@@ -114,24 +136,53 @@ class AclsDB(object):
         'explicit': set(['test-bluej', 'testgreenj', 'testops_blockmj']),
         'implicit': set(['115j', 'protectRE', 'protectRE.policer'])}
         """
-        acls = {}
+        explicit, implicit, all_acls = self._get_acls(device)
+        return {'all': set(all_acls), 'explicit': set(explicit),
+                'implicit': set(implicit)}
 
-        # Explicit (we want to make sure the key exists before we try to assign
-        # a value)
-        expl_key = 'acls:explicit:%s' % device.nodeName
-        if self.redis.exists(expl_key):
-            acls['explicit'] = self.redis.smembers(expl_key) or set()
-        else:
-            acls['explicit'] = set()
+    def _get_acls(self, device):
+        """
+        Return the cached (explicit, implicit, all) ACL frozensets for
+        @device, fetching them if needed.
+        """
+        cached = self._acl_dict_cache.get(device.nodeName)
+        if cached is None:
+            # Explicit (SMEMBERS returns an empty set for a missing key)
+            expl_key = 'acls:explicit:%s' % device.nodeName
+            cached = self._cache_acls(device, self.redis.smembers(expl_key))
+        return cached
+
+    def prefetch_acls(self, devices):
+        """
+        Fetch the explicit ACLs of every device in @devices that isn't cached
+        yet with pipelined SMEMBERS calls, so that the following
+        get_acl_dict() calls don't each need a round-trip to Redis.
+        """
+        devices = [dev for dev in devices
+                   if dev.nodeName not in self._acl_dict_cache]
+        for i in xrange(0, len(devices), PIPELINE_SIZE):
+            batch = devices[i:i + PIPELINE_SIZE]
+            pipe = self.redis.pipeline(transaction=False)
+            for dev in batch:
+                pipe.smembers('acls:explicit:%s' % dev.nodeName)
+            for dev, explicit in zip(batch, pipe.execute()):
+                self._cache_acls(dev, explicit)
+
+    def _cache_acls(self, device, explicit):
+        """
+        Build and cache the (explicit, implicit, all) ACL sets for @device
+        from its @explicit ACLs.
+        """
+        explicit = frozenset(explicit or ())
 
-        # Implicit (automatically-assigned). We're passing the explicit_acls to
-        # autoacl so that we can use them logically for auto assignments.
-        acls['implicit'] = autoacl(device, explicit_acls=acls['explicit'])
+        # Implicit (automatically-assigned). We're passing the explicit_acls
+        # to autoacl so that we can use them logically for auto assignments.
+        implicit = frozenset(autoacl(device, explicit_acls=explicit))
 
         # All
-        acls['all'] = acls['implicit'] | acls['explicit']
-
-        return acls
+        cached = (explicit, implicit, implicit | explicit)
+        self._acl_dict_cache[device.nodeName] = cached
+        return cached
 
     def get_acl_set(self, device, acl_set='all'):
         """
@@ -146,14 +197,19 @@ class AclsDB(object):
         >>> a.get_acl_set(dev, 'implicit')
         set(['protectRE', 'protectRE.policer', '115j'])
         """
-        acls_dict = self.get_acl_dict(device)
-        #ACL_SETS = ['all', 'explicit', 'implicit', 'bulk']
-        ACL_SETS = acls_dict.keys()
         if DEBUG: print 'fetching', acl_set, 'acls for', device
         if acl_set not in ACL_SETS:
-            raise exceptions.InvalidACLSet('match statement must be one of %s' % ACL_SETS)
+            raise exceptions.InvalidACLSet('match statement must be one of %s' % sorted(ACL_SETS))
+
+        # Explicit ACLs don't need autoacl(), so always read them straight
+        # from Redis rather than building and caching every set.
+        if acl_set == 'explicit':
+            expl_key = 'acls:explicit:%s' % device.nodeName
+            return set(self.redis.smembers(expl_key) or ())
 
-        return acls_dict[acl_set]
+        explicit, implicit, all_acls = self._get_acls(device)
+        acls = {'all': all_acls, 'explicit': explicit, 'implicit': implicit}
+        return set(acls[acl_set])
 
 
 # Functions
@@ -175,24 +231,54 @@ def populate_explicit_acls(aclsdb_file):
     xx,test2-abc.net.aol.com,juniper-router.policer:juniper-router-protect:abc123
     """
     import csv
+    pipe = r.pipeline(transaction=False)
+    pending = 0
     for row in csv.reader(open(aclsdb_file)):
         if not row[0].startswith('!'):
-            [r.sadd('acls:explicit:%s' % row[1], acl) for acl in row[2].split(':')]
-    r.save()
+            pipe.sadd('acls:explicit:%s' % row[1], *row[2].split(':'))
+            pending += 1
+            if pending >= PIPELINE_SIZE:
+                pipe.execute()
+                pending = 0
+    pipe.bgsave()
+    pipe.execute()
 
 def backup_explicit_acls():
     """dumps acls:explicit:* to csv"""
     import csv
     out = csv.writer(file(ACLSDB_BACKUP, 'w'))
-    for key in r.keys('acls:explicit:*'):
-        out.writerow([key.split(':')[-1], ':'.join(map(str, r.smembers(key)))])
+    pipe = r.pipeline(transaction=False)
+    keys = []
+
+    def write_rows():
+        for key, members in zip(keys, pipe.execute()):
+            out.writerow([key.split(':')[-1], ':'.join(map(str, members))])
+        del keys[:]
+
+    # SCAN rather than KEYS so Redis isn't blocked while walking the keyspace,
+    # and fetch the members of each batch of keys in one round-trip.
+    for key in r.scan_iter(match='acls:explicit:*', count=1000):
+        keys.append(key)
+        pipe.smembers(key)
+        if len(keys) >= PIPELINE_SIZE:
+            write_rows()
+    write_rows()
 
 def populate_implicit_acls(nd=None):
     """populate acls:implicit (autoacls)"""
     nd = nd or get_netdevices()
+    pipe = r.pipeline(transaction=False)
+    pending = 0
     for dev in nd.all():
-        [r.sadd('acls:implicit:%s' % dev.nodeName, acl) for acl in autoacl(dev)]
-    r.save()
+        acls = autoacl(dev)
+        if acls:
+            pipe.sadd('acls:implicit:%s' % dev.nodeName, *acls)
+            pending += 1
+            if pending >= PIPELINE_SIZE:
+                pipe.execute()
+                pending = 0
+    pipe.bgsave()
+    pipe.execute()
 
 def get_netdevices(production_only=True, with_acls=True):
     """Shortcut to import, instantiate, and return a NetDevices instance."""
@@ -214,29 +300,34 @@ def get_all_acls(nd=None):
     nd = nd or get_netdevices()
     all_acls = defaultdict(set)
     for device in nd.all():
-        [all_acls[acl].add(device) for acl in device.acls if acl != '']
+        for acl in device.acls:
+            if acl:
+                all_acls[acl].add(device)
 
     return all_acls
 
-def get_bulk_acls(nd=None):
+def get_bulk_acls(nd=None, all_acls=None):
     """
     Returns a set of acls with an applied count over
     settings.AUTOLOAD_BULK_THRESH.
+
+    @all_acls can be the output of get_all_acls() if you already have it.
     """
-    #nd = nd or settings.get_netdevices()
-    nd = nd or get_netdevices()
-    all_acls = get_all_acls()
-    bulk_acls = set([acl for acl, devs in all_acls.items() if
-                     len(devs) >= settings.AUTOLOAD_BULK_THRESH])
+    if all_acls is None:
+        all_acls = get_all_acls(nd)
+    bulk_acls = {acl for acl, devs in all_acls.iteritems() if
+                 len(devs) >= settings.AUTOLOAD_BULK_THRESH}
 
     return bulk_acls
 
-def populate_bulk_acls(nd=None):
+def populate_bulk_acls(nd=None, all_acls=None):
     """
     Given a NetDevices instance, Adds bulk_acls attribute to NetDevice objects.
+
+    @all_acls can be the output of get_all_acls() if you already have it.
     """
     nd = nd or get_netdevices()
-    bulk_acls = get_bulk_acls()
+    bulk_acls = get_bulk_acls(nd, all_acls)
     for dev in nd.all():
         dev.bulk_acls = dev.acls.intersection(bulk_acls)
 
@@ -270,36 +361,41 @@ def get_matching_acls(wanted, exact=True, match_acl=True, match_device=False, nd
     found = []
     wanted_set = set(wanted)
 
-    def match_exact(x):
-        return x & wanted_set
-
-    def match_begin(x):
-        matched = set()
-        for a in wanted_set:
-            for b in x:
-                if b.startswith(a):
-                    matched.add(b)
-        return matched
+    #nd = nd or settings.get_netdevices()
+    nd = nd or get_netdevices()
 
-    match = exact and match_exact or match_begin
+    # Names of the devices matched by name.
+    name_hits = set()
+    if match_device:
+        if exact:
+            name_hits = wanted_set
+        else:
+            name_hits = set(_prefix_matches(sorted(nd.keys()), wanted_set))
+
+    # Device names mapped to the ACLs matched by prefix, found by bisecting
+    # the sorted ACL names rather than comparing every prefix to every ACL.
+    acl_hits = defaultdict(set)
+    if match_acl and not exact:
+        acl_devices = defaultdict(set)
+        for name, dev in nd.iteritems():
+            for acl in dev.acls:
+                acl_devices[acl].add(name)
+        for acl in _prefix_matches(sorted(acl_devices), wanted_set):
+            for name in acl_devices[acl]:
+                acl_hits[name].add(acl)
 
     # Return all the ACLs if matched by device, or the matched ACLs
     # if matched by ACL.
-    #nd = nd or settings.get_netdevices()
-    nd = nd or get_netdevices()
     for name, dev in nd.iteritems():
         hit = None
-        if match_device:
-            if exact and name in wanted:
-                hit = dev.acls
-            elif not exact:
-                for x in wanted:
-                    if name.startswith(x):
-                        hit = dev.acls
-                        break
+        if name in name_hits:
+            hit = dev.acls
 
         if hit is None and match_acl:
-            hit = match(dev.acls)
+            if exact:
+                hit = dev.acls & wanted_set
+            else:
+                hit = acl_hits.get(name)
 
         if hit:
             matched = list(hit)
@@ -308,3 +404,18 @@ def get_matching_acls(wanted, exact=True, match_acl=True, match_device=False, nd
 
     found.sort()
     return found
+
+def _prefix_matches(names, prefixes):
+    """
+    Yield each of the sorted @names that starts with any of @prefixes.
+    """
+    last = None
+    for prefix in sorted(prefixes):
+        # Skip prefixes already covered by a shorter one.
+        if last is not None and prefix.startswith(last):
+            continue
+        last = prefix
+        i = bisect.bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            yield names[i]
+            i += 1
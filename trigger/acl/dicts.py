@@ -186,7 +186,7 @@ ios_icmp_messages = {
     'ttl-exceeded': (11, 0),
     'unreachable': (3,) }
 
-ios_icmp_names = dict([(v, k) for k, v in ios_icmp_messages.iteritems()])
+ios_icmp_names = {v: k for k, v in ios_icmp_messages.items()}
 
 # Ordering for JunOS match clauses.  AOL style rules:
 # 1. Use the order found in the IP header, except, put protocol at the end
@@ -218,17 +218,16 @@ junos_match_ordering_list = (
     'icmp-code',
     'icmp-type' )
 
-junos_match_order = {}
-
-for i, match in enumerate(junos_match_ordering_list):
-    junos_match_order[match] = i*2
-    junos_match_order[match+'-except'] = i*2 + 1
+junos_match_order = dict(
+    pair for i, match in enumerate(junos_match_ordering_list)
+    for pair in ((match, i*2), (match+'-except', i*2 + 1)))
 
 # These types of Juniper matches go in braces, not square brackets.
-address_matches = set(['address', 'destination-address', 'source-address', 'prefix-list', 'source-prefix-list', 'destination-prefix-list'])
-
-for match in list(address_matches):
-    address_matches.add(match+'-except')
+address_matches = frozenset(
+    match + suffix
+    for match in ('address', 'destination-address', 'source-address',
+                  'prefix-list', 'source-prefix-list', 'destination-prefix-list')
+    for suffix in ('', '-except'))
 
 # Not all of these are in /etc/services even as of RHEL 4; for example, it
 # has 'syslog' only in UDP, and 'dns' as 'domain'.  Also, Cisco (according
@@ -343,4 +342,4 @@ tcp_flag_specials = {
     'tcp-established': '"ack | rst"',
     'tcp-initial': '"syn & !ack"' }
 
-tcp_flag_rev = dict([(v, k) for k, v in tcp_flag_specials.iteritems()])
+tcp_flag_rev = {v: k for k, v in tcp_flag_specials.items()}
@@ -46,9 +46,9 @@ def S(prod):
 
 def literals(d):
     '''Longest match of all the strings that are keys of 'd'.'''
-    keys = [str(key) for key in d]
-    keys.sort(lambda x, y: len(y) - len(x))
-    return ' / '.join(['"%s"' % key for key in keys])
+    # A reversed key sort is still stable, so ties keep the order of 'd'.
+    keys = sorted(map(str, d), key=len, reverse=True)
+    return ' / '.join('"%s"' % key for key in keys)
 
 def update(d, **kwargs):
     # Check for duplicate subterms, which is legal but too confusing to be
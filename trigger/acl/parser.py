@@ -124,7 +124,16 @@ class ACLParser(Parser):
     def buildProcessor(self):
         return ACLProcessor()
 
-###parser = ACLParser(grammar)
+# Compiling the grammar is the most expensive part of parsing, so it is done
+# once, on the first call to parse(), rather than at import or on every call.
+_parser = None
+
+def _get_parser():
+    """Return the shared `ACLParser`, compiling the grammar if needed."""
+    global _parser
+    if _parser is None:
+        _parser = ACLParser(grammar)
+    return _parser
 
 def parse(input_data):
     """
@@ -139,11 +148,12 @@ def parse(input_data):
     :param input_data:
         An ACL policy as a string or file-like object.
     """
-    parser = ACLParser(grammar)
+    parser = _get_parser()
 
-    try:
+    # Strings are the common case, so don't pay for an exception on them.
+    if hasattr(input_data, 'read'):
         data = input_data.read()
-    except AttributeError:
+    else:
         data = input_data
 
     ## parse the acl
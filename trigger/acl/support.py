@@ -37,6 +37,9 @@ __email__ = 'jathanism@aol.com'
 __copyright__ = 'Copyright 2006-2013, AOL Inc.; 2013 Saleforce.com'
 
 import IPy
+import re
+import socket
+import struct
 from trigger import exceptions
 from trigger.conf import settings
 from dicts import *
@@ -45,6 +48,18 @@ from dicts import *
 # ignore them.  Yes, this makes the library not thread-safe.
 Comments = []
 
+# Compiled patterns matching any character not allowed by check_name(), keyed
+# by the value of its extra_chars argument.
+_bad_name_chars = {}
+
+def _bad_name_chars_re(extra_chars):
+    """Return the compiled pattern for invalid name characters."""
+    pattern = _bad_name_chars.get(extra_chars)
+    if pattern is None:
+        pattern = re.compile('[^a-zA-Z0-9%s]' % re.escape(extra_chars or ''))
+        _bad_name_chars[extra_chars] = pattern
+    return pattern
+
 def check_name(name, exc, max_len=255, extra_chars=' -_.'):
     """
     Test whether something is a valid identifier (for any vendor).
@@ -63,12 +78,10 @@ def check_name(name, exc, max_len=255, extra_chars=' -_.'):
         raise exc('Name cannot be null string')
     if len(name) > max_len:
         raise exc('Name "%s" cannot be longer than %d characters' % (name, max_len))
-    for char in name:
-        if not ((extra_chars is not None and char in extra_chars)
-                or (char >= 'a' and char <= 'z')
-                or (char >= 'A' and char <= 'Z')
-                or (char >= '0' and char <= '9')):
-            raise exc('Invalid character "%s" in name "%s"' % (char, name))
+    bad_char = _bad_name_chars_re(extra_chars).search(name)
+    if bad_char is not None:
+        raise exc('Invalid character "%s" in name "%s"' % (bad_char.group(),
+                                                          name))
 
 def check_range(values, min, max):
     for value in values:
@@ -222,6 +235,8 @@ class RangeList(object):
     generalized module ought to be, we can make it so without worry.
     """
     # Another way to implement this would be as a radix tree.
+    __slots__ = ('data', '_tip_index')
+
     def __init__(self, data=None):
         if data is None:
             data = []
@@ -284,33 +299,61 @@ class RangeList(object):
 
         # This last step uses a loop instead of pure functionalism because
         # it will be common to step through it tens of thousands of times,
-        # for example in the case of (1024, 65535).
+        # for example in the case of (1024, 65535). It walks the sorted list
+        # exactly once instead of recursing on a copy of the remainder.
         # [x, x+1, ..., x+n] -> [(x, x+n)]
-        n = 0
-        try:
-            while l[n] + 1 == l[n+1]:
+        ret = []
+        i, size = 0, len(l)
+        while i < size:
+            try:
+                l[i] + 1
+            except (TypeError, AttributeError):
+                # Nothing past a non-incrementable element can be reduced.
+                return ret + l[i:]
+            n = i
+            while n + 1 < size and l[n] + 1 == l[n+1]:
                 n += 1
-        except IndexError:  # entire list collapses to one range
-            return [(l[0], l[-1])]
-        if n == 0:
-            return [l[0]] + self._collapse(l[1:])
-        else:
-            return [(l[0], l[n])] + self._collapse(l[n+1:])
+            if n == i:
+                ret.append(l[i])
+            else:
+                ret.append((l[i], l[n]))
+            i = n + 1
+        return ret
 
     def _do_collapse(self):
         self.data = self._collapse(self._expand(self.data))
+        self._tip_index = None
+
+    def _build_tip_index(self):
+        """
+        Index a RangeList of IPv4 `TIP` blocks for fast containment tests.
+
+        Returns a list of ``(prefixlen, set of network bits)`` pairs sorted by
+        prefix length, or ``False`` if the data can't be indexed (anything
+        other than non-negated IPv4 `TIP` objects).
+        """
+        index = {}
+        for elt in self.data:
+            if not isinstance(elt, TIP) or elt.negated or elt.version() != 4:
+                return False
+            plen = elt.prefixlen()
+            index.setdefault(plen, set()).add(elt.int() >> (32 - plen))
+        return sorted(index.iteritems())
 
     def _expand(self, l):
         """Expand a list of elements and tuples back to discrete elements.
         Opposite of _collapse()."""
         if not l:
             return l
-        try:
-            return range(l[0][0], l[0][1]+1) + self._expand(l[1:])
-        except AttributeError:        # not incrementable
-            return l
-        except (TypeError, IndexError):
-            return [l[0]] + self._expand(l[1:])
+        ret = []
+        for i, elt in enumerate(l):
+            try:
+                ret.extend(xrange(elt[0], elt[1]+1))
+            except AttributeError:        # not incrementable
+                return ret + l[i:]
+            except (TypeError, IndexError):
+                ret.append(elt)
+        return ret
 
     def expanded(self):
         """Return a list with all ranges converted to discrete elements."""
@@ -342,7 +385,22 @@ class RangeList(object):
             * Compare single ports to tuples (i.e. 1700 in (1700, 1800))
             * Compare tuples to tuples (i.e. (1700,1800) in (0,65535))
             * Comparing tuple to integer ALWAYS returns False!!
+
+        IPv4 blocks are looked up by prefix length instead of being compared
+        one at a time.
         """
+        if isinstance(obj, TIP) and not obj.negated and obj.version() == 4:
+            if self._tip_index is None:
+                self._tip_index = self._build_tip_index()
+            if self._tip_index is not False:
+                ip, plen = obj.int(), obj.prefixlen()
+                for elt_plen, nets in self._tip_index:
+                    if elt_plen > plen:
+                        break
+                    if ip >> (32 - elt_plen) in nets:
+                        return True
+                return False
+
         for elt in self.data:
             if isinstance(elt, tuple):
                 if isinstance(obj, tuple):
@@ -379,11 +437,39 @@ class RangeList(object):
         return self.data[key]
     def __setitem__(self, key, value):
         self.data[key] = value
+        self._tip_index = None
     def __delitem__(self, key):
         del self.data[key]
+        self._tip_index = None
     def __iter__(self):
         return self.data.__iter__()
 
+# Plain IPv4 prefixes ("192.0.2.1", "10/8") that TIP can build without
+# IPy's general-purpose string parser. Octets with leading zeroes are left to
+# IPy, since inet_aton() would read them as octal.
+_ipv4_prefix_re = re.compile(r'^((?:0|[1-9]\d{0,2})(?:\.(?:0|[1-9]\d{0,2})){0,3})'
+                             r'(?:/(\d{1,2}))?$')
+_ipv4_pad = ('', '.0.0.0', '.0.0', '.0', '')
+
+def _parse_ipv4_prefix(data):
+    """
+    Return (ip, prefixlen) for a plain IPv4 prefix, or None if data should be
+    handed to IPy instead.
+    """
+    m = _ipv4_prefix_re.match(data)
+    if m is None:
+        return None
+    addr, plen = m.groups()
+    try:
+        ip = struct.unpack('>I', socket.inet_aton(
+                                    addr + _ipv4_pad[addr.count('.') + 1]))[0]
+    except socket.error:
+        return None
+    plen = 32 if plen is None else int(plen)
+    if plen > 32 or ip & (0xffffffff >> plen):
+        return None
+    return ip, plen
+
 class TIP(IPy.IP):
     """
     Class based on IPy.IP, but with extensions for Trigger.
@@ -424,7 +510,19 @@ class TIP(IPy.IP):
 
         self.negated = negated # Set 'negated' variable
         self.inactive = inactive # Set 'inactive' variable
-        IPy.IP.__init__(self, data, **kwargs)
+
+        # Plain IPv4 strings skip IPy's parser; anything else (or anything it
+        # would reject) goes through IPy as before.
+        parsed = None
+        if not kwargs and isinstance(data, str):
+            parsed = _parse_ipv4_prefix(data)
+        if parsed is None:
+            IPy.IP.__init__(self, data, **kwargs)
+        else:
+            self.NoPrefixForSingleIp = 1
+            self.WantPrefixLen = None
+            self.ip, self._prefixlen = parsed
+            self._ipversion = 4
 
         # Make it print prefixes for /32, /128 if we're negated or inactive (and
         # therefore assuming we're being used in a Juniper ACL.)
@@ -482,13 +580,21 @@ class TIP(IPy.IP):
         """
         Containment logic, including except.
         """
-        item = TIP(item)
+        if not isinstance(item, TIP):
+            item = TIP(item)
         # Calculate XOR
         xor = self.negated ^ item.negated
         # If one item is negated, it's never contained.
         if xor:
             return False
-        matched = IPy.IP.__contains__(self, item)
+        # Both are network addresses, so item is inside self when it is at
+        # least as long and shares self's network bits.
+        plen = self._prefixlen
+        if item._ipversion != self._ipversion or item._prefixlen < plen:
+            matched = False
+        else:
+            bits = 32 if self._ipversion == 4 else 128
+            matched = not (item.ip ^ self.ip) >> (bits - plen)
         return matched ^ self.negated
 
 class Comment(object):
@@ -654,7 +760,7 @@ class ACL(object):
             out.append('no access-list ' + self.name)
         prefix = 'access-list %s ' % self.name
         for t in self.terms:
-            out += [x for x in t.output_ios(prefix)]
+            out.extend(t.output_ios(prefix))
         return out
 
     def output_ios_brocade(self, replace=False, receive_acl=False):
@@ -893,7 +999,8 @@ class Term(object):
                 pass        # counters are implicit in IOS
             else:
                 raise exceptions.VendorSupportLacking('"%s" modifier not supported by IOS' % k)
-        return [prefix + action + x + suffix for x in self.match.output_ios()]
+        prefix += action
+        return [prefix + x + suffix for x in self.match.output_ios()]
 
     def output_ios(self, prefix=None, acl_name=None):
         """
@@ -962,13 +1069,17 @@ class Protocol(object):
     name2num = dict([(v, k) for k, v in num2name.iteritems()])
     name2num['ahp'] = 51    # undocumented Cisco special name
 
+    __slots__ = ('value',)
+
     def __init__(self, arg):
         if isinstance(arg, Protocol):
             self.value = arg.value
-        elif arg in Protocol.name2num:
-            self.value = Protocol.name2num[arg]
         else:
-            self.value = int(arg)
+            # One dict probe for names; anything else must be numeric.
+            value = Protocol.name2num.get(arg)
+            if value is None:
+                value = int(arg)
+            self.value = value
 
     def __str__(self):
         if self.value in Protocol.num2name:
@@ -981,6 +1092,10 @@ class Protocol(object):
 
     def __cmp__(self, other):
         '''Protocol(6) == 'tcp' == 6 == Protocol('6').'''
+        # Avoid building a throwaway Protocol when comparing against another
+        # Protocol (e.g. when sorting a RangeList of them).
+        if isinstance(other, Protocol):
+            return self.value.__cmp__(other.value)
         return self.value.__cmp__(Protocol(other).value)
 
     def __hash__(self):
@@ -990,16 +1105,47 @@ class Protocol(object):
         '''Allow arithmetic operations to work.'''
         return getattr(self.value, name)
 
+# Match types Matches knows about but doesn't implement.
+_unimplemented_matches = frozenset([
+    'ah-spi', 'destination-mac-address', 'ether-type', 'esp-spi',
+    'forwarding-class', 'interface-group', 'source-mac-address',
+    'vlan-ether-type', 'fragment-flags', 'source-class', 'destination-class',
+])
+
+# Match types whose values are converted one at a time, mapped to the
+# conversion function and the (min, max) range to check, if any.
+_match_lookups = {
+    'port': (do_port_lookup, (0, 65535)),
+    'source-port': (do_port_lookup, (0, 65535)),
+    'destination-port': (do_port_lookup, (0, 65535)),
+    'protocol': (do_protocol_lookup, (0, 255)),
+    'fragment-offset': (do_port_lookup, (0, 8191)),
+    'icmp-type': (do_icmp_type_lookup, (0, 255)),
+    'icmp-code': (do_icmp_code_lookup, (0, 255)),
+    'packet-length': (int, (0, 65535)),
+    'address': (TIP, None),
+    'source-address': (TIP, None),
+    'destination-address': (TIP, None),
+    'ip-options': (do_ip_option_lookup, (0, 255)),
+}
+
+# Setting a generic match (e.g. 'port') also clears its source/destination
+# forms; everything else only replaces itself and its -except form.
+_match_replaces = {}
+for _type in ('port', 'address', 'prefix-list'):
+    _match_replaces[_type] = (_type, _type + '-except',
+                              'source-' + _type, 'source-' + _type + '-except',
+                              'destination-' + _type,
+                              'destination-' + _type + '-except')
+del _type
+
 class Matches(MyDict):
     """
     Container class for Term.match object used for membership tests on
     access checks.
     """
     def __setitem__(self, key, arg):
-        if key in ('ah-spi', 'destination-mac-address', 'ether-type',
-                   'esp-spi', 'forwarding-class', 'interface-group',
-                   'source-mac-address', 'vlan-ether-type',
-                   'fragment-flags', 'source-class', 'destination-class'):
+        if key in _unimplemented_matches:
             raise NotImplementedError('match on %s not implemented' % key)
 
         if arg is None:
@@ -1010,21 +1156,12 @@ class Matches(MyDict):
             negated = True
             key = key[:-7]
 
-        if key in ('port', 'source-port', 'destination-port'):
-            arg = map(do_port_lookup, arg)
-            check_range(arg, 0, 65535)
-        elif key == 'protocol':
-            arg = map(do_protocol_lookup, arg)
-            check_range(arg, 0, 255)
-        elif key == 'fragment-offset':
-            arg = map(do_port_lookup, arg)
-            check_range(arg, 0, 8191)
-        elif key == 'icmp-type':
-            arg = map(do_icmp_type_lookup, arg)
-            check_range(arg, 0, 255)
-        elif key == 'icmp-code':
-            arg = map(do_icmp_code_lookup, arg)
-            check_range(arg, 0, 255)
+        lookup = _match_lookups.get(key)
+        if lookup is not None:
+            func, bounds = lookup
+            arg = map(func, arg)
+            if bounds is not None:
+                check_range(arg, *bounds)
         elif key == 'icmp-type-code':
             # Not intended for external use; this is for parser convenience.
             self['icmp-type'] = [arg[0]]
@@ -1036,11 +1173,6 @@ class Matches(MyDict):
                 except KeyError:
                     pass
             return
-        elif key == 'packet-length':
-            arg = map(int, arg)
-            check_range(arg, 0, 65535)
-        elif key in ('address', 'source-address', 'destination-address'):
-            arg = map(TIP, arg)
         elif key in ('prefix-list', 'source-prefix-list',
                      'destination-prefix-list'):
             for pl in arg:
@@ -1053,9 +1185,6 @@ class Matches(MyDict):
             key = 'tcp-flags'
         elif key == 'tcp-flags':
             pass
-        elif key == 'ip-options':
-            arg = map(do_ip_option_lookup, arg)
-            check_range(arg, 0, 255)
         elif key in ('first-fragment', 'is-fragment'):
             arg = []
         elif key == 'dscp':
@@ -1067,11 +1196,7 @@ class Matches(MyDict):
 
         arg = RangeList(arg)
 
-        replacing = [key, key+'-except']
-        for type in ('port', 'address', 'prefix-list'):
-            if key == type:
-                for sd in ('source', 'destination'):
-                    replacing += [sd+'-'+type, sd+'-'+type+'-except']
+        replacing = _match_replaces.get(key) or (key, key + '-except')
         for k in replacing:
             try: del self[k]
             except KeyError: pass
@@ -1195,9 +1320,10 @@ class Matches(MyDict):
             elif key == 'protocol':
                 protos += map(str, arg)
             elif key == 'icmp-type':
+                codes = self['icmp-code'] if 'icmp-code' in self else None
                 for type in arg.expanded():
-                    if 'icmp-code' in self:
-                        for code in self['icmp-code']:
+                    if codes is not None:
+                        for code in codes:
                             try:
                                 destports.append(ios_icmp_names[(type, code)])
                             except KeyError:
@@ -1222,28 +1348,18 @@ class Matches(MyDict):
             sources = ['any']
         if not dests:
             dests = ['any']
-        if not sourceports:
-            sourceports = ['']
-        if not destports:
-            destports = ['']
-        if not trailers:
-            trailers = ['']
-        a = []
+        # The optional fields carry their own leading space, so each line is a
+        # plain concatenation.
+        sourceports = [x and ' ' + x for x in sourceports] or ['']
+        destports = [x and ' ' + x for x in destports] or ['']
+        trailers = [x and ' ' + x for x in trailers] or ['']
 
         # There is no mercy in this Dojo!!
-        for proto in protos:
-            for source in sources:
-                for sourceport in sourceports:
-                    for dest in dests:
-                        for destport in destports:
-                            for trailer in trailers:
-                                s = proto + ' ' + source
-                                if sourceport:
-                                    s += ' ' + sourceport
-                                s += ' ' + dest
-                                if destport:
-                                    s += ' ' + destport
-                                if trailer:
-                                    s += ' ' + trailer
-                                a.append(s)
-        return a
+        return [proto + ' ' + source + sourceport + ' ' + dest + destport +
+                trailer
+                for proto in protos
+                for source in sources
+                for sourceport in sourceports
+                for dest in dests
+                for destport in destports
+                for trailer in trailers]
@@ -96,13 +96,15 @@ def _populate(netdevices, data_source, production_only, with_acls):
         log.msg("NetDevices ACL associations: DISABLED")
         aclsdb = None
 
-    # Populate `netdevices` dictionary with `NetDevice` objects!
+    # Populate `netdevices` dictionary with `NetDevice` objects! ACLs are
+    # fetched for all of the new devices at once afterward.
+    new_devices = []
     for obj in device_data:
         # Don't process it if it's already a NetDevice
         if isinstance(obj, NetDevice):
             dev = obj
         else:
-            dev = NetDevice(data=obj, with_acls=aclsdb)
+            dev = NetDevice(data=obj)
 
         # Only return devices with adminStatus of 'PRODUCTION' unless
         # `production_only` is True
@@ -119,6 +121,14 @@ def _populate(netdevices, data_source, production_only, with_acls):
 
         # Add to dict
         netdevices.add_device(dev)
+        if dev is not obj:
+            new_devices.append(dev)
+
+    if aclsdb is not None:
+        aclsdb.prefetch_acls(new_devices)
+        for dev in new_devices:
+            log.msg('[%s] Populating ACLs' % dev.nodeName)
+            dev._populate_acls(aclsdb=aclsdb)
 
     #end = time.time()
     #print 'Took %f seconds' % (end - start)
@@ -490,6 +500,7 @@ class NetDevice(object):
 
     def _get_endpoint(self, *args):
         """Private method used for generating an endpoint for `~trigger.netdevices.NetDevice`."""
+        from trigger.twister import compile_prompt_pattern
         from trigger.twister2 import generate_endpoint, TriggerEndpointClientFactory, IoslikeSendExpect
         endpoint = generate_endpoint(self).wait()
 
@@ -499,7 +510,7 @@ class NetDevice(object):
         self.factories["base"] = factory
 
         # FIXME(jathan): prompt_pattern could move back to protocol?
-        prompt = re.compile(settings.IOSLIKE_PROMPT_PAT)
+        prompt = compile_prompt_pattern(settings.IOSLIKE_PROMPT_PAT)
         proto = endpoint.connect(factory, prompt_pattern=prompt)
         self._proto = proto  # Track this for later, too.
 
@@ -577,6 +588,7 @@ class NetDevice(object):
         >>> dev.run_channeled_commands(['show ip int brief', 'show version'], on_error=lambda x: handle(x))
 
         """
+        from trigger.twister import compile_prompt_pattern
         from trigger.twister2 import TriggerSSHShellClientEndpointBase, IoslikeSendExpect, TriggerEndpointClientFactory
 
         if on_error is None:
@@ -588,7 +600,7 @@ class NetDevice(object):
 
         # Here's where we're using self._connect injected on .open()
         ep = TriggerSSHShellClientEndpointBase.existingConnection(self._conn)
-        prompt = re.compile(settings.IOSLIKE_PROMPT_PAT)
+        prompt = compile_prompt_pattern(settings.IOSLIKE_PROMPT_PAT)
         proto = ep.connect(factory, prompt_pattern=prompt)
 
         d = defer.Deferred()
@@ -57,7 +57,24 @@ class XMLLoader(BaseLoader):
     """
     is_usable = True
 
+    #: ``(path, st_mtime, st_size, nodes)`` of the last file parsed by an
+    #: XMLLoader created with ``cache=True``.
+    _last = None
+
+    def __init__(self, cache=False):
+        """
+        :param cache:
+            Keep the device nodes of the last file parsed, and reuse them
+            while its mtime and size are unchanged. Enable it by listing the
+            loader as ``('trigger.netdevices.loaders.filesystem.XMLLoader',
+            True)`` in ``settings.NETDEVICES_LOADERS``.
+        """
+        self.cache = cache
+
     def get_data(self, data_source):
+        if self.cache:
+            return self._get_cached_data(data_source)
+
         #Parsing the complete file into a tree once and extracting outthe
         # device nodes is faster than using iterparse(). Curses!!
         xml = ET.parse(data_source).findall('device')
@@ -67,6 +84,26 @@ class XMLLoader(BaseLoader):
 
         return data
 
+    def _get_cached_data(self, data_source):
+        """Like get_data(), reusing the nodes of the last file if unchanged."""
+        st = os.stat(data_source)
+        key = (data_source, st.st_mtime, st.st_size)
+        last = XMLLoader._last
+        if last is not None and last[:3] == key:
+            nodes = last[3]
+        else:
+            xml = ET.parse(data_source).findall('device')
+            nodes = [tuple((e.tag, e.text) for e in node.getchildren())
+                     for node in xml]
+            XMLLoader._last = key + (nodes,)
+
+        return (iter(node) for node in nodes)
+
+    @classmethod
+    def reset(cls):
+        """Forget the last parsed file."""
+        cls._last = None
+
     def load_data_source(self, data_source, **kwargs):
         try:
             return self.get_data(data_source)
@@ -12,7 +12,7 @@ __maintainer__ = 'Jathan McCollum'
 __email__ = 'jmccollum@salesforce.com'
 __copyright__ = 'Copyright 2006-2012, AOL Inc.; 2013 Salesforce.com'
 
-from base64 import decodestring, encodestring
+from base64 import b64encode, decodestring
 from collections import namedtuple
 from distutils.version import LooseVersion
 import getpass
@@ -355,9 +355,18 @@ class Tacacsrc(object):
             if end != '' or (realm, token) in data:
                 raise CouldNotParse("Could not parse %r at line %s" % (line, lineno))
 
-            data[(realm, token)] = self._decrypt_old(val)
+            # Decryption is batched below; a value that can't be decrypted
+            # on its own is decrypted now so that it fails right here.
+            cipher_text = decodestring(val)
+            if len(cipher_text) % 8:
+                self._decrypt_old(val)
+            data[(realm, token)] = cipher_text
             del key, val, line
 
+        # ECB blocks are independent, so every value can be decrypted with a
+        # single call.
+        data = dict(zip(data.keys(), self._decrypt_many_old(data.values())))
+
         # Store the creds, if a password is empty, try to prompt for it.
         for (realm, key), val in data.iteritems():
             if key == 'uname':
@@ -392,11 +401,22 @@ class Tacacsrc(object):
         print '\nCredentials updated for user: %r, device/realm: %r.' % \
               (new_user, realm)
 
+    def _get_cipher_old(self):
+        """
+        Return the TripleDES cipher for the old method, building it only when
+        self.key has changed since the last call.
+        """
+        cached = getattr(self, '_cipher_old', None)
+        if cached is None or cached[0] != self.key:
+            des = ciphers.algorithms.TripleDES(self.key)
+            cipher = ciphers.Cipher(des, ciphers.modes.ECB(),
+                                    backend=openssl_backend)
+            cached = self._cipher_old = (self.key, cipher)
+        return cached[1]
+
     def _encrypt_old(self, s):
         """Encodes using the old method. Adds a newline for you."""
-        des = ciphers.algorithms.TripleDES(self.key)
-        cipher = ciphers.Cipher(des, ciphers.modes.ECB(), backend=openssl_backend)
-        encryptor = cipher.encryptor()
+        encryptor = self._get_cipher_old().encryptor()
 
         # Crypt::TripleDES pads with *spaces*!  How 1960. Pad it so the
         # length is a multiple of 8.
@@ -406,17 +426,31 @@ class Tacacsrc(object):
 
         # We need to return a newline if a field is empty so as not to break
         # .tacacsrc parsing (trust me, this is easier)
-        return (encodestring(cipher_text).replace('\n', '') or '' ) + '\n'
+        return b64encode(cipher_text) + '\n'
 
     def _decrypt_old(self, s):
         """Decodes using the old method. Strips newline for you."""
-        des = ciphers.algorithms.TripleDES(self.key)
-        cipher = ciphers.Cipher(des, ciphers.modes.ECB(), backend=openssl_backend)
-        decryptor = cipher.decryptor()
+        decryptor = self._get_cipher_old().decryptor()
         # rstrip() to undo space-padding; unfortunately this means that
         # passwords cannot end in spaces.
         return decryptor.update(decodestring(s)).rstrip(' ') + decryptor.finalize()
 
+    def _decrypt_many_old(self, cipher_texts):
+        """
+        Decodes a list of already base64-decoded values using the old method
+        in one pass, returning the plain texts in the same order.
+        """
+        decryptor = self._get_cipher_old().decryptor()
+        plain = decryptor.update(''.join(cipher_texts)) + decryptor.finalize()
+        ret = []
+        offset = 0
+        for cipher_text in cipher_texts:
+            end = offset + len(cipher_text)
+            # rstrip() to undo space-padding, as in _decrypt_old().
+            ret.append(plain[offset:end].rstrip(' '))
+            offset = end
+        return ret
+
     def _read_file_old(self):
         """Read old style file and return the raw data."""
         self._update_perms()
@@ -433,8 +467,8 @@ class Tacacsrc(object):
             out.append('%s_uname_ = %s' % (realm, self._encrypt_old(uname)))
             out.append('%s_pwd_ = %s' % (realm, self._encrypt_old(pwd)))
 
-        with open(self.file_name, 'w+') as fd:
-            fd.writelines(out)
+        with open(self.file_name, 'w') as fd:
+            fd.write(''.join(out))
 
         self._update_perms()
 
@@ -47,6 +47,85 @@ __version__ = '1.5.8'
 # ==================
 #  Helper functions
 # ==================
+# Compiled prompt patterns, keyed by pattern string.
+_prompt_patterns = {}
+_pattern_type = type(re.compile(''))
+
+
+def compile_prompt_pattern(pattern):
+    """
+    Return ``pattern`` compiled as a regular expression, reusing the compiled
+    object for every channel and factory that matches the same prompt.
+
+    :param pattern:
+        A prompt pattern string, e.g. ``settings.IOSLIKE_PROMPT_PAT``, or an
+        already compiled pattern, which is returned as-is.
+    """
+    if isinstance(pattern, _pattern_type):
+        return pattern
+    try:
+        return _prompt_patterns[pattern]
+    except KeyError:
+        compiled = _prompt_patterns[pattern] = re.compile(pattern)
+        return compiled
+
+
+# How much of the buffer before newly received data is searched for a prompt.
+_PROMPT_TAIL_WINDOW = 512
+
+
+def search_prompt(prompt, data, received):
+    """
+    Search the tail of a receive buffer for a prompt and return the match.
+
+    Only the newly ``received`` data and up to ``_PROMPT_TAIL_WINDOW``
+    characters before it are searched, so that each chunk doesn't rescan the
+    whole session. The search starts at a line boundary so that a prompt at
+    the edge of the window matches just as it would over the full buffer.
+    Patterns that aren't plainly anchored to the end of the buffer (see
+    ``_is_end_anchored``) are searched in full, since they may match anywhere.
+
+    :param prompt:
+        A compiled prompt pattern
+    :param data:
+        The receive buffer, ending with ``received``
+    :param received:
+        The data received in this chunk
+    """
+    cut = len(data) - len(received) - _PROMPT_TAIL_WINDOW
+    pos = 0
+    if cut > 0 and _is_end_anchored(prompt):
+        pos = data.rfind('\n', 0, cut)
+        if pos > 0 and data[pos - 1] == '\r':
+            pos -= 1
+        pos = max(pos, 0)
+    return prompt.search(data, pos)
+
+
+# Whether each prompt pattern is anchored to the end, keyed by pattern string.
+_anchored_prompts = {}
+
+
+def _is_end_anchored(prompt):
+    """
+    Return whether the compiled ``prompt`` can only match at the end of the
+    buffer. This is decided from the pattern text alone, and conservatively:
+    the pattern must end in an unescaped ``$`` and have no alternation, and
+    multiline or verbose patterns never count.
+    """
+    try:
+        return _anchored_prompts[prompt.pattern]
+    except KeyError:
+        pattern = prompt.pattern
+        head = pattern[:-1]
+        escapes = len(head) - len(head.rstrip('\\'))
+        anchored = (not prompt.flags & (re.MULTILINE | re.VERBOSE) and
+                    pattern.endswith('$') and not escapes % 2 and
+                    '|' not in pattern)
+        _anchored_prompts[prompt.pattern] = anchored
+        return anchored
+
+
 def has_junoscript_error(tag):
     """Test whether an Element contains a Junoscript xnm:error."""
     if ElementTree(tag).find('.//{http://xml.juniper.net/xnm/1.1/xnm}error'):
@@ -101,9 +180,28 @@ def is_awaiting_confirmation(prompt):
     :param prompt:
         The prompt string to check
     """
-    prompt = prompt.lower()
-    matchlist = settings.CONTINUE_PROMPTS
-    return any(prompt.endswith(match.lower()) for match in matchlist)
+    suffixes, longest = _get_continue_prompts()
+    # Only the tail of the prompt can match, so don't lowercase the rest.
+    return prompt[-longest:].lower().endswith(suffixes)
+
+
+# Lowercased CONTINUE_PROMPTS and the longest length, keyed by the prompts.
+_continue_prompts = {}
+
+
+def _get_continue_prompts():
+    """
+    Return ``settings.CONTINUE_PROMPTS`` as a tuple of lowercased suffixes
+    and the length of the longest one, for use by `is_awaiting_confirmation`.
+    """
+    matchlist = tuple(settings.CONTINUE_PROMPTS)
+    try:
+        return _continue_prompts[matchlist]
+    except KeyError:
+        suffixes = tuple(match.lower() for match in matchlist)
+        longest = max(len(match) for match in suffixes) if suffixes else 0
+        ret = _continue_prompts[matchlist] = (suffixes, longest)
+        return ret
 
 
 def requires_enable(proto_obj, data):
@@ -789,7 +887,7 @@ class TriggerSSHChannelFactory(TriggerClientFactory):
         self.timeout = timeout
         self.channel_class = channel_class
         self.command_interval = command_interval
-        self.prompt = re.compile(prompt_pattern)
+        self.prompt = compile_prompt_pattern(prompt_pattern)
         self.device = device
         self.connection_class = connection_class
         TriggerClientFactory.__init__(self, deferred, creds)
@@ -1132,7 +1230,8 @@ class Interactor(protocol.Protocol):
     """
     def __init__(self, log_to=None):
         self._log_to = log_to
-        self.enable_prompt = re.compile(settings.IOSLIKE_ENABLE_PAT)
+        self.enable_prompt = compile_prompt_pattern(
+            settings.IOSLIKE_ENABLE_PAT)
         self.enabled = False
         self.initialized = False
 
@@ -1146,7 +1245,8 @@ class Interactor(protocol.Protocol):
         c.dataReceived = self.write
         self.stdio = stdio.StandardIO(c)
         self.device = self.factory.device  # Attach the device object
-        self.prompt = re.compile(self.device.vendor.prompt_pattern)
+        self.prompt = compile_prompt_pattern(
+            self.device.vendor.prompt_pattern)
 
     def loseConnection(self):
         """
@@ -1267,7 +1367,8 @@ class TriggerSSHChannelBase(channel.SSHChannel, TimeoutMixin, object):
                                                   self.startup_commands))
 
         # For IOS-like devices that require 'enable'
-        self.enable_prompt = re.compile(settings.IOSLIKE_ENABLE_PAT)
+        self.enable_prompt = compile_prompt_pattern(
+            settings.IOSLIKE_ENABLE_PAT)
         self.enabled = False
 
     def channelOpen(self, data):
@@ -1302,7 +1403,7 @@ class TriggerSSHChannelBase(channel.SSHChannel, TimeoutMixin, object):
         #          len(self.data)))
 
         # Keep going til you get a prompt match
-        m = self.prompt.search(self.data)
+        m = search_prompt(self.prompt, self.data, bytes)
         if not m:
             # Do we need to send an enable password?
             if not self.enabled and requires_enable(self, self.data):
@@ -1904,7 +2005,7 @@ class IoslikeSendExpect(protocol.Protocol, TimeoutMixin):
         self.with_errors = with_errors
         self.timeout = timeout
         self.command_interval = command_interval
-        self.prompt = re.compile(settings.IOSLIKE_PROMPT_PAT)
+        self.prompt = compile_prompt_pattern(settings.IOSLIKE_PROMPT_PAT)
         self.startup_commands = copy.copy(self.device.startup_commands)
         log.msg('[%s] My initialize commands: %r' % (self.device,
                                                      self.startup_commands))
@@ -1928,7 +2029,7 @@ class IoslikeSendExpect(protocol.Protocol, TimeoutMixin):
         # See if the prompt matches, and if it doesn't, see if it is waiting
         # for more input (like a [y/n]) prompt), and continue, otherwise return
         # None
-        m = self.prompt.search(self.data)
+        m = search_prompt(self.prompt, self.data, bytes)
         if not m:
             # If the prompt confirms set the index to the matched bytes,
             if is_awaiting_confirmation(self.data):
@@ -36,7 +36,8 @@ from twisted.python import log
 
 from trigger.conf import settings
 from trigger import tacacsrc, exceptions
-from trigger.twister import is_awaiting_confirmation, has_ioslike_error, TriggerSSHUserAuth
+from trigger.twister import (is_awaiting_confirmation, has_ioslike_error,
+                             search_prompt, TriggerSSHUserAuth)
 from twisted.internet import reactor
 
 
@@ -585,7 +586,7 @@ class IoslikeSendExpect(protocol.Protocol, TimeoutMixin):
         self.data += bytes # See if the prompt matches, and if it doesn't, see if it is waiting
         # for more input (like a [y/n]) prompt), and continue, otherwise return
         # None
-        m = self.prompt.search(self.data)
+        m = search_prompt(self.prompt, self.data, bytes)
         if not m:
             # If the prompt confirms set the index to the matched bytes,
             if is_awaiting_confirmation(self.data):
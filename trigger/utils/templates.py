@@ -10,6 +10,7 @@ __email__ = 'tcuthbert90@gmail.com'
 __copyright__ = 'Copyright 2016 Trigger Org'
 
 
+import cStringIO
 import sys
 import os
 from trigger.conf import settings
@@ -45,6 +46,24 @@ def get_template_path(cmd, dev_type=None):
     return os.path.join(t_dir, '{1}_{2}.template'.format(t_dir, dev_type, cmd.replace(' ', '_'))) or None
 
 
+# Template text keyed by template path
+_template_cache = {}
+
+
+def _load_textfsm(template_path):
+    """
+    Return a new TextFSM object for ``template_path``. The template file is
+    only read the first time; each call still gets its own TextFSM, since
+    parsing text accumulates results on the object.
+    """
+    try:
+        template = _template_cache[template_path]
+    except KeyError:
+        with open(template_path, 'rb') as f:
+            template = _template_cache[template_path] = f.read()
+    return textfsm.TextFSM(cStringIO.StringIO(template))
+
+
 def load_cmd_template(cmd, dev_type=None):
     """
     :param dev_type: Type of device ie cisco_ios, arista_eos
@@ -54,23 +73,18 @@ def load_cmd_template(cmd, dev_type=None):
     :returns: String template path
     """
     try:
-        with open(get_template_path(cmd, dev_type=dev_type), 'rb') as f:
-            return textfsm.TextFSM(f)
+        return _load_textfsm(get_template_path(cmd, dev_type=dev_type))
     except:
         log.msg("Unable to load template:\n{0} :: {1}".format(cmd, dev_type))
 
 
 def get_textfsm_object(re_table, cli_output):
     "Returns structure object from TextFSM data."
-    from collections import defaultdict
-    rv = defaultdict(list)
-    keys = re_table.header
     values = re_table.ParseText(cli_output)
-    l = []
-    for item in values:
-        l.extend(zip(map(lambda x: x.lower(), keys), item))
-
-    for k, v in l:
-        rv[k].append(v)
+    if not values:
+        return {}
 
-    return dict(rv)
+    # Build one list per column straight from the rows
+    keys = [key.lower() for key in re_table.header]
+    columns = zip(*values)
+    return dict(zip(keys, map(list, columns)))